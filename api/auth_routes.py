@@ -4,7 +4,7 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from models.schemas import Token
 from security.auth import create_access_token, authenticate_user
-from utils.logger import setup_logger
+from utils.logger import SAMPLED, setup_logger
 
 logger = setup_logger()
 
@@ -34,11 +34,11 @@ async def login(credentials: HTTPBasicCredentials = Depends(security_basic)) ->
     username = credentials.username
     password = credentials.password
     
-    logger.info(f"Login attempt for user: {username}")
+    logger.info("Login attempt for user: %s", username, extra=SAMPLED)
     
     # Authenticate user (demo: accepts any credentials)
     if not authenticate_user(username, password):
-        logger.warning(f"Authentication failed for user: {username}")
+        logger.warning("Authentication failed for user: %s", username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -48,7 +48,7 @@ async def login(credentials: HTTPBasicCredentials = Depends(security_basic)) ->
     # Create JWT token
     access_token = create_access_token(data={"sub": username, "user_id": username})
     
-    logger.info(f"Login successful for user: {username}")
+    logger.info("Login successful for user: %s", username, extra=SAMPLED)
     return Token(access_token=access_token, token_type="bearer")
 
 
@@ -1,15 +1,36 @@
 """Main API routes for sector analysis."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import contextvars
+import json
+import os
 
-from models.schemas import AnalyzeResponse
-from security.auth import get_current_user
+from models.schemas import (
+    AnalyzeResponse,
+    BatchAnalyzeItem,
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
+    ReportHistoryItem,
+    ReportHistoryResponse,
+)
+from security.auth import get_current_user, token_cache
+from security.rate_limit_backends import BackendUnavailableError
 from security.rate_limiter import rate_limiter
 from services.search_service import SearchService
-from services.ai_service import AIService
-from utils.logger import setup_logger
-from utils.validators import validate_sector, normalize_sector
+from services.admission import AdmissionTimeoutError, gemini_admission
+from services.ai_service import AIService, MULTI_SECTOR_MAX, PROMPT_VERSION
+from services.pregenerator import ReportPregenerator
+from services.report_cache import CachedReport, report_cache
+from services.report_store import ReportStore, create_report_store_from_env
+from utils.logger import SAMPLED, setup_logger
+from utils.metrics import cache_lookups
+from utils.singleflight import SingleFlight
+from utils.timing import describe, timed_stage
+from utils.validators import VALID_SECTORS, validate_sector, normalize_sector
 
 logger = setup_logger()
 
@@ -17,22 +38,369 @@ router = APIRouter()
 
 # Initialize services
 search_service = SearchService()
-ai_service = None  # Will be initialized on first request
+ai_service = None  # Initialized in the background at startup (or on first request)
+_ai_service_lock = asyncio.Lock()
+report_store: Optional[ReportStore] = None  # Opened at startup (stays None when disabled)
+report_flights = SingleFlight()
+# Background refreshes of stale reports, one per cache key
+_revalidations: Dict[tuple, asyncio.Task] = {}
+
+# Maximum sectors of one batch request analyzed at the same time
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+# Oldest stored report served (as stale) on a cache miss instead of generating
+# cold; never above the report cache's hard TTL, so the store does not serve
+# reports the cache would already have dropped
+_REPORT_CACHE_HARD_TTL = report_cache.ttl_seconds + report_cache.max_stale_seconds
+REPORT_STORE_MAX_AGE_SECONDS = min(
+    float(os.getenv("REPORT_STORE_MAX_AGE_SECONDS", str(_REPORT_CACHE_HARD_TTL))), _REPORT_CACHE_HARD_TTL
+)
 
 
-def get_ai_service() -> AIService:
-    """Lazy initialization of AI service."""
+async def init_ai_service() -> Optional[AIService]:
+    """
+    Initialize the AI service off the event loop.
+    
+    AIService construction lists and probes Gemini models synchronously, so
+    it runs in a worker thread. The lock ensures only one instance is built
+    even if startup and early requests race.
+    
+    Returns:
+        The AI service, or None if initialization failed
+    """
     global ai_service
-    if ai_service is None:
+    async with _ai_service_lock:
+        if ai_service is None:
+            try:
+                ai_service = await asyncio.to_thread(AIService)
+            except ValueError as e:
+                logger.error("Failed to initialize AI service: %s", e)
+        return ai_service
+
+
+# Keeps reports for hot sectors warm in the cache (started on startup when enabled)
+pregenerator = ReportPregenerator(
+    search_service,
+    init_ai_service,
+    report_cache,
+    sectors=[
+        normalize_sector(sector)
+        for sector in os.getenv("PREGENERATE_SECTORS", ",".join(VALID_SECTORS)).split(",")
+        if sector.strip()
+    ],
+    interval=float(os.getenv("PREGENERATE_INTERVAL_SECONDS", "600")),
+    max_concurrency=int(os.getenv("PREGENERATE_MAX_CONCURRENCY", "2")),
+    group_size=int(os.getenv("PREGENERATE_GROUP_SIZE", str(MULTI_SECTOR_MAX))),
+)
+
+
+def open_report_store() -> Optional[ReportStore]:
+    """
+    Open the report store and start its background writer.
+    
+    Returns:
+        The report store, or None if it is disabled
+    """
+    global report_store
+    if report_store is None:
+        report_store = create_report_store_from_env()
+        if report_store is not None:
+            report_store.start()
+            pregenerator.store = report_store
+    return report_store
+
+
+async def close_report_store() -> None:
+    """Write queued reports and close the report store."""
+    global report_store
+    if report_store is not None:
+        pregenerator.store = None
+        await report_store.close()
+        report_store = None
+
+
+def is_ai_service_ready() -> bool:
+    """Check whether the AI service has finished initializing."""
+    return ai_service is not None
+
+
+async def get_ai_service() -> AIService:
+    """Get the AI service, waiting for initialization if it is still running."""
+    service = ai_service or await init_ai_service()
+    if service is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="AI service not available. Please check GEMINI_API_KEY configuration.",
+        )
+    return service
+
+
+async def _generate_report(
+    normalized_sector: str, ai_service: AIService, cache_key: tuple, user_id: str
+) -> str:
+    """
+    Run search and generation for a sector and cache the resulting report.
+    
+    Args:
+        normalized_sector: Normalized sector name
+        ai_service: Initialized AI service
+        cache_key: Report cache key for the sector
+        user_id: User the Gemini call is queued under
+        
+    Returns:
+        Markdown report
+    """
+    # 3. Fetch market data
+    logger.info("Fetching market data for sector: %s", normalized_sector, extra=SAMPLED)
+    market_data = await search_service.search_market_data(normalized_sector, max_results=10)
+    
+    # 4. Generate AI report
+    logger.info("Generating AI report for sector: %s", normalized_sector, extra=SAMPLED)
+    report = await ai_service.generate_market_report(normalized_sector, market_data, user_id)
+    
+    # Error reports are not cached so the next request retries generation
+    if not ai_service.is_error_report(report):
+        _save_report(normalized_sector, ai_service, cache_key, report)
+    
+    return report
+
+
+def _save_report(normalized_sector: str, ai_service: AIService, cache_key: tuple, report: str) -> None:
+    """
+    Cache a freshly generated report and queue it for the report store.
+    
+    Args:
+        normalized_sector: Normalized sector name
+        ai_service: AI service that generated the report
+        cache_key: Report cache key for the sector
+        report: Markdown report
+    """
+    report_cache.set(cache_key, report)
+    if report_store is not None:
+        report_store.save(
+            normalized_sector,
+            report,
+            ai_service.model_name_used,
+            PROMPT_VERSION,
+            search_service.get_fingerprint(normalized_sector),
+        )
+
+
+async def load_stored_reports() -> int:
+    """
+    Warm the report cache with the latest stored report of each sector.
+    
+    Only reports from the current model and prompt version that are still
+    within the cache's hard TTL are loaded, keeping their original age.
+    
+    Returns:
+        Number of reports loaded
+    """
+    service = await init_ai_service()
+    if service is None or report_store is None:
+        return 0
+    
+    try:
+        latest = await report_store.latest_per_sector(service.model_name_used, PROMPT_VERSION)
+    except Exception as e:
+        logger.warning("Could not load stored reports: %s", e)
+        return 0
+    
+    loaded = 0
+    for stored in latest:
+        cache_key = report_cache.make_key(stored.sector, service.model_name_used, PROMPT_VERSION)
+        if report_cache.lookup(cache_key) is None and stored.age < report_cache.ttl_seconds + report_cache.max_stale_seconds:
+            report_cache.set(cache_key, stored.report, age=stored.age)
+            loaded += 1
+    logger.info("Loaded %d stored reports into the report cache", loaded)
+    return loaded
+
+
+def _revalidate(normalized_sector: str, ai_service: AIService, cache_key: tuple, user_id: str) -> None:
+    """
+    Refresh a stale report in the background.
+    
+    At most one refresh runs per cache key; it shares in-flight work with
+    concurrent cache misses through report_flights. The refresh runs in an
+    empty context so its timings are not added to the triggering request.
+    
+    Args:
+        normalized_sector: Normalized sector name
+        ai_service: Initialized AI service
+        cache_key: Report cache key for the sector
+        user_id: User the Gemini call is queued under
+    """
+    if cache_key in _revalidations:
+        return
+    
+    async def refresh() -> None:
         try:
-            ai_service = AIService()
-        except ValueError as e:
-            logger.error(f"Failed to initialize AI service: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="AI service not available. Please check GEMINI_API_KEY configuration.",
+            await report_flights.do(
+                cache_key,
+                lambda: _generate_report(normalized_sector, ai_service, cache_key, user_id),
             )
-    return ai_service
+        except AdmissionTimeoutError:
+            logger.warning("Gemini capacity exhausted; stale report for %s not refreshed", normalized_sector)
+        except Exception as e:
+            logger.warning("Failed to refresh stale report for %s: %s", normalized_sector, e)
+        finally:
+            _revalidations.pop(cache_key, None)
+    
+    logger.info("Refreshing stale report for sector: %s", normalized_sector, extra=SAMPLED)
+    _revalidations[cache_key] = contextvars.Context().run(asyncio.create_task, refresh())
+
+
+async def _lookup_report(
+    normalized_sector: str, ai_service: AIService, user_id: str
+) -> Tuple[tuple, Optional[str], str, float]:
+    """
+    Look up a sector's report, refreshing it in the background if stale.
+    
+    On a cache miss the latest stored report from the current model and
+    prompt version is used if it is younger than REPORT_STORE_MAX_AGE_SECONDS,
+    so sectors are not generated cold after a restart or eviction.
+    
+    Args:
+        normalized_sector: Normalized sector name
+        ai_service: Initialized AI service
+        user_id: User a refresh is queued under
+        
+    Returns:
+        Tuple of (cache key, cached report or None, cache status, age in
+        seconds); the status is ``fresh``, ``stale`` or ``miss``
+    """
+    cache_key = report_cache.make_key(normalized_sector, ai_service.model_name_used, PROMPT_VERSION)
+    cached = report_cache.lookup(cache_key)
+    if cached is None:
+        cache_lookups.inc(cache="report", result="miss")
+        if report_store is None:
+            return cache_key, None, "miss", 0.0
+        
+        stored = await report_store.latest(normalized_sector, ai_service.model_name_used, PROMPT_VERSION)
+        if stored is None or stored.age >= REPORT_STORE_MAX_AGE_SECONDS:
+            cache_lookups.inc(cache="report_store", result="miss")
+            return cache_key, None, "miss", 0.0
+        
+        cache_lookups.inc(cache="report_store", result="hit")
+        # Cached with its original age, so it expires when it would have anyway
+        report_cache.set(cache_key, stored.report, age=stored.age)
+        cached = CachedReport(stored.report, stored.age, stored.age >= report_cache.ttl_seconds)
+        logger.info("Serving stored report for sector: %s", normalized_sector, extra=SAMPLED)
+    else:
+        cache_lookups.inc(cache="report", result="stale" if cached.stale else "hit")
+    
+    if cached.stale:
+        _revalidate(normalized_sector, ai_service, cache_key, user_id)
+    return cache_key, cached.report, "stale" if cached.stale else "fresh", cached.age
+
+
+def _cache_headers(cache_status: str, age: float) -> Dict[str, str]:
+    """Build the headers reporting a report's cache status and age in seconds."""
+    return {"X-Report-Cache": cache_status, "Age": str(int(age))}
+
+
+async def _get_or_generate_report(
+    normalized_sector: str, ai_service: AIService, user_id: str
+) -> Tuple[str, str, float]:
+    """
+    Serve a sector's report from cache, or generate it on a miss.
+    
+    Stale reports are served immediately while a background refresh runs.
+    Concurrent misses for the same sector share one search + generation.
+    
+    Args:
+        normalized_sector: Normalized sector name
+        ai_service: Initialized AI service
+        user_id: User the Gemini call is queued under
+        
+    Returns:
+        Tuple of (Markdown report, cache status, age in seconds); the
+        status is ``fresh``, ``stale`` or ``miss``
+    """
+    cache_key, report, cache_status, age = await _lookup_report(normalized_sector, ai_service, user_id)
+    if report is not None:
+        return report, cache_status, age
+    
+    report = await report_flights.do(
+        cache_key,
+        lambda: _generate_report(normalized_sector, ai_service, cache_key, user_id),
+    )
+    return report, cache_status, age
+
+
+def _validate_sector(sector: str) -> str:
+    """
+    Normalize and validate a sector name.
+    
+    Args:
+        sector: Raw sector name from the request
+        
+    Returns:
+        Normalized sector name
+        
+    Raises:
+        HTTPException: If the sector is invalid
+    """
+    with timed_stage("validation"):
+        normalized_sector = normalize_sector(sector)
+        is_valid = validate_sector(normalized_sector, strict=False)
+    if not is_valid:
+        logger.warning("Invalid sector format: %s", sector)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sector format. Sector must contain only letters, numbers, spaces, and hyphens.",
+        )
+    return normalized_sector
+
+
+async def _check_rate_limit(user_id: str, cost: int = 1) -> None:
+    """
+    Consume rate-limit slots for the user.
+    
+    Args:
+        user_id: Authenticated user identifier
+        cost: Number of slots to consume (all or nothing)
+        
+    Raises:
+        HTTPException: If the rate limit is exceeded, or 503 if the rate-limit
+            backend is unavailable (the limiter fails closed)
+    """
+    try:
+        with timed_stage("rate_limit", "ratelimit"):
+            is_allowed, remaining, reset_after = await rate_limiter.is_allowed(user_id, cost)
+    except BackendUnavailableError as e:
+        logger.error("Rate limit check failed for user %s: %s", user_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Rate limiting is temporarily unavailable. Please retry later.",
+            headers={"Retry-After": "1"},
+        )
+    if not is_allowed:
+        logger.warning("Rate limit exceeded for user: %s", user_id)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded. Please try again after {reset_after} seconds.",
+            headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": str(reset_after)},
+        )
+
+
+async def _validate_and_check_rate_limit(sector: str, user_id: str) -> str:
+    """
+    Validate a sector and consume a rate-limit slot for the user.
+    
+    Args:
+        sector: Raw sector name from the request
+        user_id: Authenticated user identifier
+        
+    Returns:
+        Normalized sector name
+        
+    Raises:
+        HTTPException: If the sector is invalid or the rate limit is exceeded
+    """
+    normalized_sector = _validate_sector(sector)
+    await _check_rate_limit(user_id)
+    return normalized_sector
 
 
 @router.get(
@@ -43,6 +411,7 @@ def get_ai_service() -> AIService:
 )
 async def analyze_sector(
     sector: str,
+    response: Response,
     current_user: dict = Depends(get_current_user),
 ) -> AnalyzeResponse:
     """
@@ -51,55 +420,42 @@ async def analyze_sector(
     This endpoint:
     1. Validates the sector input
     2. Checks rate limits for the user
-    3. Fetches recent market data
-    4. Generates AI-powered analysis report
+    3. Fetches recent market data (skipped on report cache hit)
+    4. Generates AI-powered analysis report (skipped on report cache hit)
     5. Returns structured Markdown report
     
+    A stale cached report is returned immediately and refreshed in the
+    background. The ``X-Report-Cache`` (fresh, stale or miss) and ``Age``
+    headers report where the report came from and how old it is.
+    
     Args:
         sector: Sector name (e.g., pharmaceuticals, technology)
+        response: Response whose headers are set
         current_user: Authenticated user (from JWT)
         
     Returns:
         AnalyzeResponse with Markdown report
         
     Raises:
-        HTTPException: For validation, rate limit, or service errors
+        HTTPException: For validation, rate limit, capacity (503), or service errors
     """
     user_id = current_user.get("user_id", current_user.get("username", "unknown"))
     
-    logger.info(f"Analysis request for sector '{sector}' from user: {user_id}")
-    
-    # 1. Validate sector input
-    normalized_sector = normalize_sector(sector)
-    if not validate_sector(normalized_sector, strict=False):
-        logger.warning(f"Invalid sector format: {sector}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid sector format. Sector must contain only letters, numbers, spaces, and hyphens.",
-        )
+    logger.info("Analysis request for sector '%s' from user: %s", sector, user_id, extra=SAMPLED)
     
-    # 2. Check rate limiting
-    is_allowed, remaining, reset_after = await rate_limiter.is_allowed(user_id)
-    if not is_allowed:
-        logger.warning(f"Rate limit exceeded for user: {user_id}")
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Rate limit exceeded. Please try again after {reset_after} seconds.",
-            headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": str(reset_after)},
-        )
+    # 1. Validate sector input and 2. check rate limiting
+    normalized_sector = await _validate_and_check_rate_limit(sector, user_id)
     
     try:
-        # 3. Fetch market data
-        logger.info(f"Fetching market data for sector: {normalized_sector}")
-        market_data = await search_service.search_market_data(normalized_sector, max_results=10)
-        
-        # 4. Generate AI report
-        logger.info(f"Generating AI report for sector: {normalized_sector}")
-        ai_service = get_ai_service()
-        report = await ai_service.generate_market_report(normalized_sector, market_data)
+        ai_service = await get_ai_service()
+        report, cache_status, age = await _get_or_generate_report(normalized_sector, ai_service, user_id)
+        describe("cache", cache_status)
+        response.headers.update(_cache_headers(cache_status, age))
+        if cache_status != "miss":
+            logger.info("Serving %s cached report for sector: %s", cache_status, normalized_sector, extra=SAMPLED)
         
         # 5. Return response
-        logger.info(f"Analysis complete for sector: {normalized_sector}")
+        logger.info("Analysis complete for sector: %s", normalized_sector, extra=SAMPLED)
         return AnalyzeResponse(
             sector=normalized_sector,
             report=report,
@@ -109,14 +465,309 @@ async def analyze_sector(
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except AdmissionTimeoutError as e:
+        logger.warning("Gemini capacity exhausted for sector %s", normalized_sector)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis capacity is currently exhausted. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
-        logger.error(f"Error analyzing sector {normalized_sector}: {str(e)}", exc_info=True)
+        logger.error("Error analyzing sector %s: %s", normalized_sector, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while analyzing the sector: {str(e)}",
         )
 
 
+def _sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get(
+    "/analyze/{sector}/stream",
+    summary="Stream trade opportunities analysis for a sector",
+    description="Stream the Markdown report as Server-Sent Events while Gemini generates it.",
+)
+async def analyze_sector_stream(
+    sector: str,
+    current_user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Stream a trade opportunities analysis as Server-Sent Events.
+    
+    Emits ``chunk`` events with Markdown text as it is generated, followed by
+    one ``done`` event with the sector, timestamp, full structured report and
+    the ``prefix``/``suffix`` added by the report structure fixes. Cached
+    reports are sent as a single chunk; stale ones are refreshed in the
+    background. The ``X-Report-Cache`` and ``Age`` headers report the cache
+    status and age as for the non-streaming endpoint.
+    
+    Args:
+        sector: Sector name (e.g., pharmaceuticals, technology)
+        current_user: Authenticated user (from JWT)
+        
+    Returns:
+        StreamingResponse with ``text/event-stream`` content
+        
+    Raises:
+        HTTPException: For validation or rate limit errors
+    """
+    user_id = current_user.get("user_id", current_user.get("username", "unknown"))
+    
+    logger.info("Streaming analysis request for sector '%s' from user: %s", sector, user_id, extra=SAMPLED)
+    
+    normalized_sector = await _validate_and_check_rate_limit(sector, user_id)
+    ai_service = await get_ai_service()
+    cache_key, cached_report, cache_status, age = await _lookup_report(normalized_sector, ai_service, user_id)
+    
+    async def event_stream():
+        if cached_report is not None:
+            logger.info("Streaming %s cached report for sector: %s", cache_status, normalized_sector, extra=SAMPLED)
+            yield _sse_event("chunk", {"text": cached_report})
+            yield _sse_event("done", {
+                "sector": normalized_sector,
+                "generated_at": datetime.now().isoformat(),
+                "report": cached_report,
+                "prefix": "",
+                "suffix": "",
+                "cached": True,
+                "stale": cache_status == "stale",
+                "error": False,
+            })
+            return
+        
+        market_data = await search_service.search_market_data(normalized_sector, max_results=10)
+        try:
+            async for event in ai_service.stream_market_report(normalized_sector, market_data, user_id):
+                if event["event"] == "chunk":
+                    yield _sse_event("chunk", {"text": event["text"]})
+                    continue
+                
+                if not event["error"]:
+                    _save_report(normalized_sector, ai_service, cache_key, event["report"])
+                yield _sse_event("done", {
+                    "sector": normalized_sector,
+                    "generated_at": datetime.now().isoformat(),
+                    "report": event["report"],
+                    "prefix": event["prefix"],
+                    "suffix": event["suffix"],
+                    "cached": False,
+                    "stale": False,
+                    "error": event["error"],
+                })
+        except AdmissionTimeoutError as e:
+            # Headers are already sent, so report the rejection in-stream
+            logger.warning("Gemini capacity exhausted for streamed sector %s", normalized_sector)
+            yield _sse_event("error", {
+                "detail": "Analysis capacity is currently exhausted. Please retry later.",
+                "retry_after": e.retry_after,
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **_cache_headers(cache_status, age)},
+    )
+
+
+async def _analyze_batch_item(
+    normalized_sector: str, ai_service: AIService, user_id: str, semaphore: asyncio.Semaphore
+) -> BatchAnalyzeItem:
+    """
+    Analyze one sector of a batch, capturing failures in the item.
+    
+    Args:
+        normalized_sector: Normalized sector name
+        ai_service: Initialized AI service
+        user_id: User the Gemini call is queued under
+        semaphore: Bounds how many sectors of the batch run at once
+        
+    Returns:
+        BatchAnalyzeItem with the report, or the status and error it failed with
+    """
+    async with semaphore:
+        try:
+            report, cache_status, age = await _get_or_generate_report(normalized_sector, ai_service, user_id)
+        except AdmissionTimeoutError:
+            logger.warning("Gemini capacity exhausted for batch sector %s", normalized_sector)
+            return BatchAnalyzeItem(
+                sector=normalized_sector,
+                generated_at=datetime.now().isoformat(),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                error="Analysis capacity is currently exhausted. Please retry later.",
+            )
+        except Exception as e:
+            logger.error("Error analyzing batch sector %s: %s", normalized_sector, e, exc_info=True)
+            return BatchAnalyzeItem(
+                sector=normalized_sector,
+                generated_at=datetime.now().isoformat(),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                error=f"An error occurred while analyzing the sector: {str(e)}",
+            )
+    
+    return BatchAnalyzeItem(
+        sector=normalized_sector,
+        report=report,
+        generated_at=datetime.now().isoformat(),
+        cached=cache_status != "miss",
+        stale=cache_status == "stale",
+        age_seconds=int(age),
+    )
+
+
+@router.post(
+    "/analyze/batch",
+    response_model=BatchAnalyzeResponse,
+    summary="Analyze trade opportunities for several sectors",
+    description="Analyze up to 20 sectors in one request, fanning out concurrently.",
+)
+async def analyze_batch(
+    request: BatchAnalyzeRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Analyze several sectors in one request.
+    
+    Every sector is validated before any work starts, and the whole batch
+    is charged against the user's rate limit up front (one request per
+    distinct sector). A batch with more distinct sectors than the limit
+    allows per window (the burst in GCRA mode) is rejected with 400, since
+    it could never be admitted. Sectors then run concurrently, up to
+    BATCH_MAX_CONCURRENCY at a time, sharing the report cache and in-flight
+    generations with the single-sector endpoints. A failing sector does not
+    fail the batch: its item carries the status code and error instead.
+    
+    With ``stream`` set, results are written as NDJSON lines in completion
+    order as soon as each sector finishes.
+    
+    Args:
+        request: Sectors to analyze and the response mode
+        current_user: Authenticated user (from JWT)
+        
+    Returns:
+        BatchAnalyzeResponse in request order, or a StreamingResponse with
+        ``application/x-ndjson`` content
+        
+    Raises:
+        HTTPException: For validation errors, batches larger than the rate
+            limit allows, or rate limit errors
+    """
+    user_id = current_user.get("user_id", current_user.get("username", "unknown"))
+    
+    logger.info("Batch analysis request for %d sectors from user: %s", len(request.sectors), user_id, extra=SAMPLED)
+    
+    sectors: List[str] = []
+    invalid: List[str] = []
+    for sector in request.sectors:
+        try:
+            normalized_sector = _validate_sector(sector)
+        except HTTPException:
+            invalid.append(sector)
+            continue
+        if normalized_sector not in sectors:
+            sectors.append(normalized_sector)
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sector format: {', '.join(invalid)}. Sectors must contain only letters, numbers, spaces, and hyphens.",
+        )
+    
+    # A batch larger than the whole allowance would get 429 on every retry
+    if len(sectors) > rate_limiter.max_cost:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Batch of {len(sectors)} sectors exceeds the rate limit of {rate_limiter.max_cost} "
+                f"requests per window. Split it into batches of at most {rate_limiter.max_cost} sectors."
+            ),
+        )
+    
+    await _check_rate_limit(user_id, cost=len(sectors))
+    ai_service = await get_ai_service()
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    
+    if not request.stream:
+        results = await asyncio.gather(*(
+            _analyze_batch_item(sector, ai_service, user_id, semaphore) for sector in sectors
+        ))
+        logger.info("Batch analysis complete for %d sectors", len(sectors), extra=SAMPLED)
+        return BatchAnalyzeResponse(results=results)
+    
+    async def ndjson_stream():
+        tasks = [
+            asyncio.create_task(_analyze_batch_item(sector, ai_service, user_id, semaphore))
+            for sector in sectors
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield item.model_dump_json() + "\n"
+        finally:
+            # Client disconnected: stop sectors that have not finished
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/analyze/{sector}/history",
+    response_model=ReportHistoryResponse,
+    summary="List stored reports for a sector",
+    description="List previously generated reports for a sector from the report store, newest first.",
+)
+async def get_report_history(
+    sector: str,
+    limit: int = Query(20, ge=1, le=200),
+    before: Optional[datetime] = Query(None, description="Only reports generated before this time (for paging)"),
+    current_user: dict = Depends(get_current_user),
+) -> ReportHistoryResponse:
+    """
+    List stored report metadata for a sector.
+    
+    Args:
+        sector: Sector name (e.g., pharmaceuticals, technology)
+        limit: Maximum number of reports
+        before: Only return reports generated before this time
+        current_user: Authenticated user (from JWT)
+        
+    Returns:
+        ReportHistoryResponse with report metadata, newest first
+        
+    Raises:
+        HTTPException: If the sector is invalid or the report store is disabled
+    """
+    normalized_sector = _validate_sector(sector)
+    if report_store is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Report history is not available (REPORT_STORE_ENABLED is false).",
+        )
+    
+    stored = await report_store.history(
+        normalized_sector, limit=limit, before=before.timestamp() if before is not None else None
+    )
+    return ReportHistoryResponse(
+        sector=normalized_sector,
+        reports=[
+            ReportHistoryItem(
+                id=item.id,
+                generated_at=datetime.fromtimestamp(item.generated_at).isoformat(),
+                model_name=item.model_name,
+                prompt_version=item.prompt_version,
+                search_fingerprint=item.search_fingerprint,
+            )
+            for item in stored
+        ],
+    )
+
+
 @router.get(
     "/rate-limit-info",
     summary="Get rate limit information",
@@ -133,6 +784,46 @@ async def get_rate_limit_info(current_user: dict = Depends(get_current_user)) ->
         Dictionary with rate limit information
     """
     user_id = current_user.get("user_id", current_user.get("username", "unknown"))
-    info = await rate_limiter.get_rate_limit_info(user_id)
+    try:
+        info = await rate_limiter.get_rate_limit_info(user_id)
+    except BackendUnavailableError as e:
+        logger.error("Rate limit lookup failed for user %s: %s", user_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Rate limiting is temporarily unavailable. Please retry later.",
+            headers={"Retry-After": "1"},
+        )
     return info
 
+
+
+@router.get(
+    "/stats",
+    summary="Get service statistics",
+    description="Get internal cache statistics for the service.",
+)
+async def get_stats(current_user: dict = Depends(get_current_user)) -> dict:
+    """
+    Get service statistics.
+    
+    Args:
+        current_user: Authenticated user (from JWT)
+        
+    Returns:
+        Dictionary with report cache counters
+    """
+    return {
+        "report_cache": report_cache.get_stats(),
+        "search_cache": search_service.get_cache_stats(),
+        "gemini_executor": ai_service.get_executor_stats() if ai_service is not None else None,
+        "gemini_admission": gemini_admission.get_stats(),
+        "pregenerator": pregenerator.get_stats(),
+        "report_store": report_store.get_stats() if report_store is not None else None,
+        "rate_limiter": rate_limiter.get_stats(),
+        "token_cache": token_cache.get_stats(),
+        "analyze_coalescing": {
+            "in_flight": report_flights.in_flight(),
+            "coalesced": report_flights.coalesced,
+            "revalidating": len(_revalidations),
+        },
+    }
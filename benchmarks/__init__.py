@@ -0,0 +1 @@
+"""Micro-benchmarks and load tests (not part of the application)."""
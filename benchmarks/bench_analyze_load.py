@@ -0,0 +1,251 @@
+"""
+Offline load test for the analyze endpoints.
+
+Starts a FakeSearchServer, builds the AI service around a FakeGeminiModel,
+serves the app with uvicorn on a local port and drives it with concurrent
+async clients. Reports throughput, latency percentiles per status code,
+degraded (error report) responses and the mean of each Server-Timing
+stage. Throughput, TTFB and stage means count only 200 responses, so fast
+rejections (429, 503) do not flatter the pipeline's numbers. No network access or Gemini quota is used.
+
+App settings read from the environment at import time (for example
+GEMINI_MAX_CONCURRENCY, GEMINI_USE_ASYNC or LOG_ASYNC) apply as usual.
+Rate limits (RATE_LIMIT_MAX_REQUESTS, IP_RATE_LIMIT_ENABLED) are lifted
+unless set explicitly. The report and search
+caches and the report store are disabled by default so every request runs
+the full pipeline.
+
+Client and server share one process and event loop, so absolute numbers
+include client overhead; compare runs against each other.
+
+Usage:
+    python -m benchmarks.bench_analyze_load --requests 500 --concurrency 50
+    python -m benchmarks.bench_analyze_load --stream \\
+        --gemini-first-chunk lognormal:0.8,0.4 --gemini-chunk-interval constant:0.05 \\
+        --gemini-error-rate 0.02 --search-latency lognormal:0.3,0.5
+"""
+
+import os
+import math
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import itertools
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+import uvicorn
+
+from benchmarks.fake_gemini import FakeGeminiModel
+from benchmarks.fake_search import FakeSearchServer
+from benchmarks.latency import LatencyDistribution
+from utils.validators import VALID_SECTORS
+
+
+class LoadResult:
+    """Measurements collected across all clients."""
+
+    def __init__(self):
+        # {status code: [seconds]}
+        self.latencies: Dict[int, List[float]] = {}
+        self.first_byte: List[float] = []
+        self.statuses: Counter = Counter()
+        self.degraded = 0
+        self.failures = 0
+        self.stage_totals: Dict[str, float] = {}
+        self.stage_counts: Counter = Counter()
+
+    def add_server_timing(self, header: str) -> None:
+        for entry in header.split(","):
+            name, *params = entry.strip().split(";")
+            for param in params:
+                if param.startswith("dur="):
+                    self.stage_totals[name] = self.stage_totals.get(name, 0.0) + float(param[4:])
+                    self.stage_counts[name] += 1
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def client_loop(client, counter, total: int, sectors: List[str], tokens: List[str],
+                      stream: bool, error_marker: str, result: LoadResult) -> None:
+    """Issue requests back to back until the shared counter reaches total."""
+    for index in counter:
+        if index >= total:
+            return
+        sector = sectors[index % len(sectors)]
+        headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+        start = time.perf_counter()
+        try:
+            if stream:
+                async with client.stream("GET", f"/analyze/{sector}/stream", headers=headers) as response:
+                    parts = []
+                    async for chunk in response.aiter_text():
+                        if not parts and response.status_code == 200:
+                            result.first_byte.append(time.perf_counter() - start)
+                        parts.append(chunk)
+                    body = "".join(parts)
+                degraded = '"error": true' in body
+            else:
+                response = await client.get(f"/analyze/{sector}", headers=headers)
+                degraded = response.status_code == 200 and error_marker in response.json()["report"]
+        except httpx.HTTPError:
+            result.failures += 1
+            continue
+
+        result.latencies.setdefault(response.status_code, []).append(time.perf_counter() - start)
+        result.statuses[response.status_code] += 1
+        result.degraded += degraded
+        if response.status_code == 200 and "server-timing" in response.headers:
+            result.add_server_timing(response.headers["server-timing"])
+
+
+async def run_load(base_url: str, args, tokens: List[str], sectors: List[str],
+                   error_marker: str, total: int) -> LoadResult:
+    result = LoadResult()
+    counter = itertools.count()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        await asyncio.gather(*(
+            client_loop(client, counter, total, sectors, tokens, args.stream, error_marker, result)
+            for _ in range(args.concurrency)
+        ))
+    return result
+
+
+def report(args, result: LoadResult, elapsed: float, gemini: FakeGeminiModel, search: FakeSearchServer) -> None:
+    endpoint = "/analyze/{sector}/stream" if args.stream else "/analyze/{sector}"
+    print(f"{args.requests} requests to {endpoint}, concurrency {args.concurrency}")
+    print(f"Gemini: first chunk {args.gemini_first_chunk}, chunk interval {args.gemini_chunk_interval}, "
+          f"{args.gemini_chunks} chunks, error rate {args.gemini_error_rate}")
+    print(f"Search: latency {args.search_latency}, error rate {args.search_error_rate}, {args.search_chunks} chunks")
+    print()
+    completed = len(result.latencies.get(200, []))
+    print(f"Throughput:   {completed / elapsed:,.1f} req/s with status 200 "
+          f"({sum(result.statuses.values()) / elapsed:,.1f} req/s overall, {elapsed:.2f}s)")
+    for code, values in sorted(result.latencies.items()):
+        values = sorted(values)
+        print(f"Latency {code} (ms): " + "  ".join(
+            f"{label} {percentile(values, pct) * 1000:,.1f}"
+            for label, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        ))
+    if result.first_byte:
+        first_byte = sorted(result.first_byte)
+        print("TTFB (ms):    " + "  ".join(
+            f"{label} {percentile(first_byte, pct) * 1000:,.1f}"
+            for label, pct in (("p50", 50), ("p95", 95), ("p99", 99))
+        ))
+    print("Status:       " + "  ".join(f"{code}={count}" for code, count in sorted(result.statuses.items())))
+    print(f"Degraded:     {result.degraded} error reports, {result.failures} transport failures")
+    if result.stage_counts:
+        print("Stages (mean ms over 200s, from Server-Timing): " + "  ".join(
+            f"{name} {result.stage_totals[name] / count:,.1f}" for name, count in result.stage_counts.items()
+        ))
+    print(f"Fakes:        gemini {gemini.calls} calls ({gemini.errors} failed), "
+          f"search {search.requests} requests ({search.errors} failed)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline load test for /analyze")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=0, help="Unmeasured requests sent first")
+    parser.add_argument("--users", type=int, default=10, help="Distinct authenticated users")
+    parser.add_argument("--sectors", default=",".join(VALID_SECTORS), help="Comma-separated sectors to cycle through")
+    parser.add_argument("--stream", action="store_true", help="Use the SSE streaming endpoint")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--report-cache-ttl", type=int, default=0)
+    parser.add_argument("--report-cache-max-stale", type=int, default=0)
+    parser.add_argument("--search-cache-ttl", type=int, default=0)
+    parser.add_argument("--gemini-first-chunk", default="lognormal:0.8,0.4", help="Time to first chunk spec")
+    parser.add_argument("--gemini-chunk-interval", default="constant:0.05", help="Delay spec between chunks")
+    parser.add_argument("--gemini-chunks", type=int, default=8)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--search-latency", default="lognormal:0.3,0.5", help="Search response latency spec")
+    parser.add_argument("--search-error-rate", type=float, default=0.0)
+    parser.add_argument("--search-chunks", type=int, default=1, help="Send search bodies in this many chunks")
+    parser.add_argument("--search-chunk-interval", default="constant:0")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    search = FakeSearchServer(
+        latency=LatencyDistribution.parse(args.search_latency),
+        error_rate=args.search_error_rate,
+        chunks=args.search_chunks,
+        chunk_interval=LatencyDistribution.parse(args.search_chunk_interval),
+        seed=args.seed,
+    )
+    search_server = await search.start()
+    search_port = search_server.sockets[0].getsockname()[1]
+
+    # Module-level services read their settings at import, so configure first
+    os.environ.setdefault("SEARCH_URL", f"http://127.0.0.1:{search_port}/html/")
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ.setdefault("JWT_SECRET_KEY", "offline-benchmark-secret")
+    os.environ.setdefault("RATE_LIMIT_MAX_REQUESTS", str(10 ** 9))
+    os.environ.setdefault("IP_RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("REPORT_CACHE_TTL_SECONDS", str(args.report_cache_ttl))
+    os.environ.setdefault("REPORT_CACHE_MAX_STALE_SECONDS", str(args.report_cache_max_stale))
+    os.environ.setdefault("SEARCH_CACHE_TTL_SECONDS", str(args.search_cache_ttl))
+    os.environ.setdefault("SEARCH_CACHE_MOCK_TTL_SECONDS", str(args.search_cache_ttl))
+    os.environ.setdefault("REPORT_STORE_ENABLED", "false")
+
+    import api.routes as routes
+    from main import app
+    from security.auth import create_access_token
+    from services.ai_service import AIService, ERROR_REPORT_MARKER
+
+    logging.getLogger("trade_opportunities_api").setLevel(logging.WARNING)
+
+    gemini = FakeGeminiModel(
+        first_chunk_latency=LatencyDistribution.parse(args.gemini_first_chunk),
+        chunk_interval=LatencyDistribution.parse(args.gemini_chunk_interval),
+        chunks=args.gemini_chunks,
+        error_rate=args.gemini_error_rate,
+        seed=args.seed,
+    )
+    routes.ai_service = AIService(model=gemini)
+
+    app_port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=app_port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            await server_task
+            return
+        await asyncio.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{app_port}"
+    tokens = [create_access_token({"sub": f"user-{i}", "user_id": f"user-{i}"}) for i in range(args.users)]
+    sectors = [sector.strip() for sector in args.sectors.split(",") if sector.strip()]
+    try:
+        if args.warmup:
+            await run_load(base_url, args, tokens, sectors, ERROR_REPORT_MARKER, args.warmup)
+            gemini.calls = gemini.errors = search.requests = search.errors = 0
+        start = time.perf_counter()
+        result = await run_load(base_url, args, tokens, sectors, ERROR_REPORT_MARKER, args.requests)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        await server_task
+        search_server.close()
+        await search_server.wait_closed()
+
+    report(args, result, elapsed, gemini, search)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark for RateLimiter.is_allowed at large limits.
+
+Measures the per-call cost for a user sitting at their limit (every call
+is denied) and for a user whose window is full and rolling (every call
+expires one timestamp and admits one request). The GCRA mode and a
+baseline using the previous list-rebuild algorithm are included for
+comparison.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter
+"""
+
+import asyncio
+import logging
+import time
+import types
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import security.rate_limit_backends as backends_module
+from security.rate_limiter import RateLimiter
+
+LIMITS = [10, 100, 1_000, 10_000]
+CALLS = 20_000
+
+
+class FakeClock:
+    """Monotonic clock that advances a fixed step on every read."""
+
+    def __init__(self, step: float):
+        self.now = 0.0
+        self.step = step
+
+    def monotonic(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+class ListRateLimiter:
+    """Baseline: rebuild the user's list and scan it with min() on every call."""
+
+    def __init__(self, max_requests: int, window_seconds: float, clock: FakeClock):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._requests: dict = {}
+        self._lock = asyncio.Lock()
+
+    async def is_allowed(self, user_id: str):
+        async with self._lock:
+            now = self.clock.monotonic()
+            cutoff_time = now - self.window_seconds
+            user_requests: List[float] = self._requests.setdefault(user_id, [])
+            user_requests[:] = [t for t in user_requests if t > cutoff_time]
+            is_allowed = len(user_requests) < self.max_requests
+            if is_allowed:
+                user_requests.append(now)
+            else:
+                min(user_requests)
+            return is_allowed, 0, self.window_seconds
+
+
+@contextmanager
+def backend_clock(clock: FakeClock) -> Iterator[None]:
+    """Drive the rate-limit backends' monotonic clock from clock within the block."""
+    original = backends_module.time
+    backends_module.time = types.SimpleNamespace(monotonic=clock.monotonic)
+    try:
+        yield
+    finally:
+        backends_module.time = original
+
+
+def make_limiter(impl: str, limit: int, window: float, clock: FakeClock):
+    """Build a limiter of the given implementation (run it inside backend_clock(clock))."""
+    if impl == "list":
+        return ListRateLimiter(limit, window, clock)
+    algorithm = "gcra" if impl == "gcra" else "sliding_window"
+    return RateLimiter(max_requests=limit, window_seconds=window, algorithm=algorithm)
+
+
+async def bench(impl: str, limit: int, rolling: bool) -> float:
+    """Return mean microseconds per is_allowed call."""
+    clock = FakeClock(step=1.0)
+    # Rolling: exactly `limit` calls fit in the window, so each call expires one.
+    # Saturated: the window never ends, so every call past the limit is denied.
+    window = limit - 0.5 if rolling else 1e12
+    with backend_clock(clock):
+        limiter = make_limiter(impl, limit, window, clock)
+        for _ in range(limit):
+            await limiter.is_allowed("bench-user")
+
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            await limiter.is_allowed("bench-user")
+        return (time.perf_counter() - start) / CALLS * 1e6
+
+
+async def main() -> None:
+    # Denied calls log a warning each; keep them out of the measurement
+    logging.getLogger("trade_opportunities_api").setLevel(logging.ERROR)
+    print(f"{'limit':>8} {'impl':>6} {'saturated us/call':>18} {'rolling us/call':>16}")
+    for limit in LIMITS:
+        for impl in ("deque", "gcra", "list"):
+            saturated = await bench(impl, limit, rolling=False)
+            rolling = await bench(impl, limit, rolling=True)
+            print(f"{limit:>8} {impl:>6} {saturated:>18.2f} {rolling:>16.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""
+Contention benchmark for RateLimiter lock striping.
+
+Runs thousands of concurrent users, each issuing a burst of is_allowed
+calls with a yield to the event loop between calls, and reports total
+throughput for a single global lock, several stripe counts, and the
+lock-free mode.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter_contention
+"""
+
+import asyncio
+import logging
+import time
+
+from security.rate_limiter import RateLimiter
+
+USERS = 5_000
+CALLS_PER_USER = 20
+STRIPES = [1, 16, 64, 0]
+
+
+async def user_burst(limiter: RateLimiter, user_id: str) -> None:
+    """Issue a burst of checks for one user, yielding between calls."""
+    for _ in range(CALLS_PER_USER):
+        await limiter.is_allowed(user_id)
+        await asyncio.sleep(0)
+
+
+async def bench(num_stripes: int) -> float:
+    """Return checks per second across all users."""
+    limiter = RateLimiter(max_requests=CALLS_PER_USER, window_seconds=60, num_stripes=num_stripes)
+    start = time.perf_counter()
+    await asyncio.gather(*(user_burst(limiter, f"user-{i}") for i in range(USERS)))
+    elapsed = time.perf_counter() - start
+    return USERS * CALLS_PER_USER / elapsed
+
+
+async def main() -> None:
+    logging.getLogger("trade_opportunities_api").setLevel(logging.ERROR)
+    print(f"{USERS} concurrent users x {CALLS_PER_USER} checks")
+    print(f"{'stripes':>10} {'checks/s':>12}")
+    for num_stripes in STRIPES:
+        rate = await bench(num_stripes)
+        label = str(num_stripes) if num_stripes else "lock-free"
+        print(f"{label:>10} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
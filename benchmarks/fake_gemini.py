@@ -0,0 +1,163 @@
+"""
+In-process stand-in for a Gemini GenerativeModel.
+
+FakeGeminiModel implements the generate_content / generate_content_async
+methods AIService calls, including ``stream=True``, with a configurable
+time to first chunk, chunk pacing, error rate and report size. Pass it to
+AIService(model=...) to exercise the full generation path (admission,
+executor or native async mode, streaming, post-processing) without
+network access or API quota.
+"""
+
+import re
+import time
+import random
+import asyncio
+from typing import AsyncIterator, Iterator, List, Optional
+
+from benchmarks.latency import LatencyDistribution
+
+_SECTIONS = [
+    "Sector Overview",
+    "Current Market Trends in India",
+    "Recent News & Signals",
+    "Trade Opportunities",
+    "Risks & Challenges",
+    "Short-term Outlook",
+    "Disclaimer",
+]
+
+_SECTOR_BEGIN = re.compile(r"^=== BEGIN SECTOR: (.+?) ===$", re.MULTILINE)
+
+
+class FakeGeminiError(RuntimeError):
+    """Injected generation failure."""
+
+
+class _Chunk:
+    """Response or stream chunk exposing ``text`` like the SDK objects."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _AsyncStream:
+    """Async iterator over paced chunks, like the SDK's async stream response."""
+
+    def __init__(self, model: "FakeGeminiModel", chunks: List[str], fail_at: Optional[int]):
+        self._model = model
+        self._chunks = chunks
+        self._fail_at = fail_at
+
+    async def __aiter__(self) -> AsyncIterator[_Chunk]:
+        for index, text in enumerate(self._chunks):
+            if index:
+                await asyncio.sleep(self._model.chunk_interval.sample())
+            if index == self._fail_at:
+                raise FakeGeminiError("Injected failure mid-stream")
+            yield _Chunk(text)
+
+
+class FakeGeminiModel:
+    """
+    Fake GenerativeModel with configurable latency, errors and streaming.
+
+    A call waits ``first_chunk_latency`` before the first chunk and
+    ``chunk_interval`` between each of ``chunks`` chunks. Non-streaming
+    calls return after the same total time. With probability
+    ``error_rate`` a call fails with FakeGeminiError: before any output
+    for non-streaming calls, and partway through for streaming ones.
+    """
+
+    def __init__(
+        self,
+        first_chunk_latency: Optional[LatencyDistribution] = None,
+        chunk_interval: Optional[LatencyDistribution] = None,
+        chunks: int = 8,
+        error_rate: float = 0.0,
+        report_bytes: int = 4096,
+        model_name: str = "models/fake-gemini",
+        seed: Optional[int] = None,
+    ):
+        self.rng = random.Random(seed)
+        self.first_chunk_latency = first_chunk_latency or LatencyDistribution("constant", 0.0)
+        self.chunk_interval = chunk_interval or LatencyDistribution("constant", 0.0)
+        self.chunks = max(1, chunks)
+        self.error_rate = error_rate
+        self.report_bytes = report_bytes
+        self.model_name = model_name
+        self.calls = 0
+        self.errors = 0
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        """Blocking generation, as used by AIService's executor mode."""
+        chunks, fail_at = self._plan(prompt)
+        if not stream:
+            time.sleep(self._total_delay())
+            if fail_at is not None:
+                raise FakeGeminiError("Injected generation failure")
+            return _Chunk("".join(chunks))
+        return self._iter_chunks(chunks, fail_at)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        """Native async generation."""
+        chunks, fail_at = self._plan(prompt)
+        await asyncio.sleep(self.first_chunk_latency.sample())
+        if not stream:
+            await asyncio.sleep(sum(self.chunk_interval.sample() for _ in range(self.chunks - 1)))
+            if fail_at is not None:
+                raise FakeGeminiError("Injected generation failure")
+            return _Chunk("".join(chunks))
+        return _AsyncStream(self, chunks, fail_at)
+
+    def _iter_chunks(self, chunks: List[str], fail_at: Optional[int]) -> Iterator[_Chunk]:
+        time.sleep(self.first_chunk_latency.sample())
+        for index, text in enumerate(chunks):
+            if index:
+                time.sleep(self.chunk_interval.sample())
+            if index == fail_at:
+                raise FakeGeminiError("Injected failure mid-stream")
+            yield _Chunk(text)
+
+    def _total_delay(self) -> float:
+        return self.first_chunk_latency.sample() + sum(
+            self.chunk_interval.sample() for _ in range(self.chunks - 1)
+        )
+
+    def _plan(self, prompt: str):
+        """Build the report chunks and decide whether (and where) this call fails."""
+        self.calls += 1
+        chunks = self._split(self._report(prompt))
+        fail_at = None
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            fail_at = self.rng.randrange(len(chunks))
+        return chunks, fail_at
+
+    def _report(self, prompt: str) -> str:
+        sectors = [s for s in _SECTOR_BEGIN.findall(prompt) if s != "<sector>"]
+        if sectors:
+            # Multi-sector prompt: one delimited report per sector
+            return "\n".join(
+                f"=== BEGIN SECTOR: {sector} ===\n{self._sector_report(sector)}=== END SECTOR: {sector} ===\n"
+                for sector in sectors
+            )
+        sector = "the"
+        marker = "trade opportunities report for the "
+        start = prompt.find(marker)
+        if start != -1:
+            sector = prompt[start + len(marker):].split(" sector", 1)[0]
+        return self._sector_report(sector)
+
+    def _sector_report(self, sector: str) -> str:
+        filler = f"Synthetic analysis of the {sector} sector. " * 8
+        per_section = max(1, self.report_bytes // len(_SECTIONS))
+        body = "".join(
+            f"## {title}\n\n{(filler * (per_section // len(filler) + 1))[:per_section]}\n\n"
+            for title in _SECTIONS
+        )
+        return f"# {sector.title()} Sector - Trade Opportunities Analysis\n\n{body}"
+
+    def _split(self, report: str) -> List[str]:
+        size = -(-len(report) // self.chunks)
+        return [report[i:i + size] for i in range(0, len(report), size)]
@@ -0,0 +1,150 @@
+"""
+Fake Redis-protocol server for exercising RedisBackend without Redis.
+
+It understands PING, ECHO, SELECT, AUTH and the rate limiter's scripts via
+EVAL/EVALSHA. Scripts are matched by SHA1 and run as Python equivalents
+under one asyncio lock, so they are atomic like real Redis scripts.
+tests/test_redis_scripts.py checks the equivalents against the Lua on a
+real server when REDIS_TEST_URL is set.
+
+Usage:
+    python -m benchmarks.fake_redis --port 6390
+    RATE_LIMIT_BACKEND=redis RATE_LIMIT_REDIS_URL=redis://localhost:6390/0 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import hashlib
+from typing import Any, Callable, Dict, List
+
+from security.rate_limit_backends import _GCRA_SCRIPT, _SLIDING_WINDOW_SCRIPT, gcra_check, gcra_peek
+
+
+class FakeRedisServer:
+    """In-memory server speaking enough RESP2 for the rate limiter."""
+
+    def __init__(self, reply_delay: float = 0.0):
+        # Seconds to wait before sending each reply, to model a slow server
+        self.reply_delay = reply_delay
+        # {key: {member: score}}
+        self.zsets: Dict[str, Dict[str, float]] = {}
+        # {key: value} for GCRA TATs (expiry is not modelled)
+        self.strings: Dict[str, str] = {}
+        self.loaded_scripts = set()
+        self._scripts: Dict[str, Callable[[List[str], List[str]], Any]] = {
+            self._sha(_SLIDING_WINDOW_SCRIPT): self._sliding_window,
+            self._sha(_GCRA_SCRIPT): self._gcra,
+        }
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _sha(script: str) -> str:
+        return hashlib.sha1(script.encode("utf-8")).hexdigest()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """Start listening; port 0 picks a free port."""
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                args = await self._read_command(reader)
+                async with self._lock:
+                    reply = self._dispatch(args)
+                if self.reply_delay:
+                    await asyncio.sleep(self.reply_delay)
+                writer.write(reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> List[str]:
+        header = await reader.readuntil(b"\r\n")
+        count = int(header[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2].decode("utf-8"))
+        return args
+
+    def _dispatch(self, args: List[str]) -> bytes:
+        command = args[0].upper()
+        if command == "PING":
+            return b"+PONG\r\n"
+        if command == "ECHO":
+            return self._encode(args[1])
+        if command in ("SELECT", "AUTH"):
+            return b"+OK\r\n"
+        if command in ("EVAL", "EVALSHA"):
+            sha = self._sha(args[1]) if command == "EVAL" else args[1]
+            if command == "EVALSHA" and sha not in self.loaded_scripts:
+                return b"-NOSCRIPT No matching script.\r\n"
+            script = self._scripts.get(sha)
+            if script is None:
+                return b"-ERR unknown script\r\n"
+            self.loaded_scripts.add(sha)
+            num_keys = int(args[2])
+            keys, argv = args[3:3 + num_keys], args[3 + num_keys:]
+            return self._encode(script(keys, argv))
+        return b"-ERR unknown command\r\n"
+
+    def _encode(self, value: Any) -> bytes:
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(self._encode(v) for v in value)
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        data = str(value).encode("utf-8")
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def _sliding_window(self, keys: List[str], argv: List[str]) -> List[Any]:
+        zset = self.zsets.setdefault(keys[0], {})
+        now, window, limit, cost = float(argv[0]), float(argv[1]), int(argv[2]), int(argv[5])
+        for member in [m for m, score in zset.items() if score <= now - window]:
+            del zset[member]
+        count = len(zset)
+        allowed = 0
+        wait_index = 0
+        if count + cost <= limit:
+            allowed = 1
+            if argv[4] == "1":
+                for i in range(1, cost + 1):
+                    zset[f"{argv[3]}:{i}"] = now
+                count += cost
+        elif argv[4] == "1":
+            if count + cost - limit > count:
+                return [0, 0, repr(window)]
+            wait_index = count + cost - limit - 1
+        scores = sorted(zset.values())
+        reset_after = scores[wait_index] + window - now if scores else 0
+        return [allowed, limit - count, repr(reset_after)]
+
+    def _gcra(self, keys: List[str], argv: List[str]) -> List[Any]:
+        now, interval, burst = float(argv[0]), float(argv[1]), int(argv[2])
+        stored = self.strings.get(keys[0])
+        tat = float(stored) if stored is not None else None
+        if argv[3] == "0":
+            remaining, reset_after = gcra_peek(now, tat, interval, burst)
+            return [1, remaining, repr(reset_after)]
+        allowed, new_tat, remaining, reset_after = gcra_check(now, tat, interval, burst, int(argv[4]))
+        if allowed:
+            self.strings[keys[0]] = repr(new_tat)
+        return [int(allowed), remaining, repr(reset_after)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = await FakeRedisServer().start(args.host, args.port)
+    print(f"Fake Redis listening on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+"""
+Fake DuckDuckGo HTML search server.
+
+Serves a results page shaped like html.duckduckgo.com/html/ over HTTP/1.1
+with keep-alive. The response latency, error rate and body pacing can be
+configured: with ``chunks > 1`` the body is sent with chunked transfer
+encoding, pausing ``chunk_interval`` between chunks like a slow upstream.
+
+Usage:
+    python -m benchmarks.fake_search --port 8089 --latency lognormal:0.3,0.5 --error-rate 0.05
+    SEARCH_URL=http://127.0.0.1:8089/html/ uvicorn main:app
+"""
+
+import html
+import random
+import asyncio
+import argparse
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.latency import LatencyDistribution
+
+_REASONS = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}
+
+
+class FakeSearchServer:
+    """Minimal HTTP server returning DuckDuckGo-style result pages."""
+
+    def __init__(
+        self,
+        latency: Optional[LatencyDistribution] = None,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        results: int = 10,
+        chunks: int = 1,
+        chunk_interval: Optional[LatencyDistribution] = None,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency or LatencyDistribution("constant", 0.0)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.results = results
+        self.chunks = max(1, chunks)
+        self.chunk_interval = chunk_interval or LatencyDistribution("constant", 0.0)
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """Start listening; port 0 picks a free port."""
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0"))
+                if length:
+                    await reader.readexactly(length)
+
+                _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                await self._respond(writer, target)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, target: str) -> None:
+        self.requests += 1
+        await asyncio.sleep(self.latency.sample())
+
+        url = urlsplit(target)
+        if not url.path.startswith("/html"):
+            await self._send(writer, 404, [b"not found"])
+            return
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            await self._send(writer, self.error_status, [b"upstream unavailable"])
+            return
+
+        query = parse_qs(url.query).get("q", [""])[0]
+        body = self._page(query).encode("utf-8")
+        size = -(-len(body) // self.chunks)
+        await self._send(writer, 200, [body[i:i + size] for i in range(0, len(body), size)])
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, parts: List[bytes]) -> None:
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\nContent-Type: text/html; charset=utf-8\r\n"
+        if len(parts) == 1:
+            writer.write(f"{head}Content-Length: {len(parts[0])}\r\n\r\n".encode("latin-1") + parts[0])
+            await writer.drain()
+            return
+
+        writer.write(f"{head}Transfer-Encoding: chunked\r\n\r\n".encode("latin-1"))
+        for index, part in enumerate(parts):
+            if index:
+                await asyncio.sleep(self.chunk_interval.sample())
+            writer.write(f"{len(part):x}\r\n".encode("latin-1") + part + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _page(self, query: str) -> str:
+        escaped = html.escape(query)
+        results = "".join(
+            f'<div class="result results_links web-result"><div class="links_main result__body">'
+            f'<h2 class="result__title"><a class="result__a" href="https://example.com/{i}">'
+            f"{escaped} headline {i}</a></h2>"
+            f'<a class="result__snippet" href="https://example.com/{i}">'
+            f"Synthetic snippet {i} about {escaped} with market figures and analyst commentary.</a>"
+            f"</div></div>"
+            for i in range(1, self.results + 1)
+        )
+        return (
+            f"<!DOCTYPE html><html><head><title>{escaped} at DuckDuckGo</title></head>"
+            f'<body><div id="links" class="results">{results}</div></body></html>'
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake DuckDuckGo HTML search server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="constant:0", help="Response latency spec, e.g. lognormal:0.3,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--results", type=int, default=10)
+    parser.add_argument("--chunks", type=int, default=1, help="Send the body in this many chunks")
+    parser.add_argument("--chunk-interval", default="constant:0", help="Delay spec between body chunks")
+    args = parser.parse_args()
+
+    fake = FakeSearchServer(
+        latency=LatencyDistribution.parse(args.latency),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        results=args.results,
+        chunks=args.chunks,
+        chunk_interval=LatencyDistribution.parse(args.chunk_interval),
+    )
+    server = await fake.start(args.host, args.port)
+    print(f"Fake search server listening on http://{args.host}:{args.port}/html/")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""Latency distributions for the fake Gemini and search backends."""
+
+import random
+from typing import Optional
+
+
+class LatencyDistribution:
+    """
+    Random delay in seconds drawn from a named distribution.
+
+    Specs are written ``kind:params``:
+
+    - ``constant:0.5``: always 0.5s
+    - ``uniform:0.2,1.0``: uniform between 0.2s and 1.0s
+    - ``normal:0.8,0.2``: mean 0.8s, standard deviation 0.2s
+    - ``lognormal:0.8,0.5``: median 0.8s, log-space sigma 0.5 (long tail)
+    - ``exponential:0.3``: mean 0.3s
+
+    Negative samples are clamped to zero.
+    """
+
+    KINDS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, kind: str = "constant", a: float = 0.0, b: float = 0.0, rng: Optional[random.Random] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution {kind!r}; expected one of {self.KINDS}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+        self.rng = rng or random.Random()
+
+    @classmethod
+    def parse(cls, spec: str, rng: Optional[random.Random] = None) -> "LatencyDistribution":
+        """Build a distribution from a ``kind:params`` spec."""
+        kind, _, params = spec.partition(":")
+        values = [float(value) for value in params.split(",") if value] if params else []
+        values += [0.0] * (2 - len(values))
+        return cls(kind, values[0], values[1], rng)
+
+    def sample(self) -> float:
+        """Draw one delay in seconds."""
+        if self.kind == "constant":
+            value = self.a
+        elif self.kind == "uniform":
+            value = self.rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = self.rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            value = self.a * self.rng.lognormvariate(0.0, self.b) if self.a > 0 else 0.0
+        else:
+            value = self.rng.expovariate(1.0 / self.a) if self.a > 0 else 0.0
+        return max(0.0, value)
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{self.a:g},{self.b:g}"
@@ -7,13 +7,28 @@ and returning trade opportunity insights for given sectors.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+import asyncio
 import os
 from dotenv import load_dotenv
 
-from api.routes import router
+from api.routes import (
+    router,
+    search_service,
+    init_ai_service,
+    is_ai_service_ready,
+    load_stored_reports,
+    open_report_store,
+    close_report_store,
+    pregenerator,
+)
 from api.auth_routes import auth_router
-from utils.logger import setup_logger
+from security.ip_limiter import IPRateLimitMiddleware, ip_rate_limiter
+from security.keyring import keyring
+from security.rate_limiter import rate_limiter
+from utils.logger import setup_logger, shutdown_logging
+from utils.metrics import metrics
+from utils.timing import ServerTimingMiddleware
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +36,11 @@ load_dotenv()
 # Initialize logger
 logger = setup_logger()
 
+# Background AI service initialization task (started on startup)
+ai_init_task = None
+# Background load of stored reports into the report cache (started on startup)
+report_load_task = None
+
 # Create FastAPI app
 app = FastAPI(
     title="Trade Opportunities API",
@@ -57,8 +77,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Report-Cache", "Age"],
 )
 
+# Report per-stage latency of /analyze requests in a Server-Timing header
+if os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes"):
+    app.add_middleware(ServerTimingMiddleware)
+
+# Reject floods per client IP before authentication runs
+if os.getenv("IP_RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes"):
+    app.add_middleware(IPRateLimitMiddleware, limiter=ip_rate_limiter, exempt_paths=("/health", "/metrics"))
+
 # Include routers
 app.include_router(router)
 app.include_router(auth_router)
@@ -80,15 +109,30 @@ async def health_check():
     """Health check endpoint."""
     # Check if Gemini API key is configured
     gemini_key = os.getenv("GEMINI_API_KEY")
-    status = "healthy" if gemini_key else "degraded"
+    ai_ready = is_ai_service_ready()
+    if not gemini_key:
+        status = "degraded"
+    elif not ai_ready and ai_init_task is not None and not ai_init_task.done():
+        status = "initializing"
+    elif not ai_ready:
+        status = "degraded"
+    else:
+        status = "healthy"
     
     return {
         "status": status,
         "service": "Trade Opportunities API",
         "gemini_configured": bool(gemini_key),
+        "ai_service_ready": ai_ready,
     }
 
 
+@app.get("/metrics", tags=["health"], include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus metrics endpoint."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc: HTTPException):
     """Custom HTTP exception handler."""
@@ -98,13 +142,15 @@ async def http_exception_handler(request, exc: HTTPException):
             "detail": exc.detail,
             "status_code": exc.status_code,
         },
+        # Keep Retry-After and rate-limit headers set on the exception
+        headers=exc.headers,
     )
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc: Exception):
     """General exception handler."""
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
     return JSONResponse(
         status_code=500,
         content={
@@ -117,6 +163,9 @@ async def general_exception_handler(request, exc: Exception):
 @app.on_event("startup")
 async def startup_event():
     """Application startup event."""
+    global ai_init_task, report_load_task
+    # Restart the background log listener if a previous shutdown stopped it
+    setup_logger()
     logger.info("Trade Opportunities API starting up...")
     
     # Validate required environment variables
@@ -128,6 +177,26 @@ async def startup_event():
         )
     else:
         logger.info("GEMINI_API_KEY configured")
+        # Discover models and build the AI service without blocking startup
+        ai_init_task = asyncio.create_task(init_ai_service())
+    
+    # Open the pooled HTTP client shared by all searches
+    await search_service.start()
+    
+    # Persist generated reports and serve the latest ones after a restart
+    if open_report_store() is not None and gemini_key:
+        report_load_task = asyncio.create_task(load_stored_reports())
+    
+    # Evict idle users from the rate limiter in the background
+    rate_limiter.start()
+    ip_rate_limiter.start()
+    
+    # Rotate JWT signing keys on schedule (no-op for keys from the environment)
+    keyring.start()
+    
+    # Keep hot sectors' reports warm so requests rarely wait on Gemini
+    if gemini_key and os.getenv("PREGENERATE_ENABLED", "false").lower() in ("1", "true", "yes"):
+        pregenerator.start()
     
     logger.info("Application startup complete")
 
@@ -136,6 +205,14 @@ async def startup_event():
 async def shutdown_event():
     """Application shutdown event."""
     logger.info("Trade Opportunities API shutting down...")
+    
+    await pregenerator.close()
+    await close_report_store()
+    await search_service.close()
+    await rate_limiter.close()
+    await ip_rate_limiter.close()
+    await keyring.close()
+    shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -2,6 +2,11 @@
 
 from .schemas import (
     AnalyzeResponse,
+    BatchAnalyzeItem,
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
+    ReportHistoryItem,
+    ReportHistoryResponse,
     Token,
     TokenData,
     SectorAnalysisRequest,
@@ -9,8 +14,12 @@ from .schemas import (
 
 __all__ = [
     "AnalyzeResponse",
+    "BatchAnalyzeItem",
+    "BatchAnalyzeRequest",
+    "BatchAnalyzeResponse",
+    "ReportHistoryItem",
+    "ReportHistoryResponse",
     "Token",
     "TokenData",
     "SectorAnalysisRequest",
 ]
-
@@ -1,7 +1,7 @@
 """Pydantic schemas for request/response validation."""
 
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List, Optional
 import re
 
 
@@ -44,3 +44,51 @@ class AnalyzeResponse(BaseModel):
     report: str = Field(..., description="Structured Markdown report")
     generated_at: str = Field(..., description="ISO format timestamp")
 
+
+class BatchAnalyzeRequest(BaseModel):
+    """Schema for batch sector analysis request."""
+    sectors: List[str] = Field(
+        ...,
+        description="Sector names to analyze (duplicates are analyzed once)",
+        min_length=1,
+        max_length=20,
+    )
+    stream: bool = Field(
+        False,
+        description="Return one NDJSON line per sector as each finishes instead of a combined response",
+    )
+
+
+class BatchAnalyzeItem(BaseModel):
+    """Result for one sector of a batch analysis."""
+    sector: str
+    report: Optional[str] = Field(None, description="Structured Markdown report (None on error)")
+    generated_at: str = Field(..., description="ISO format timestamp")
+    cached: bool = Field(False, description="Whether the report was served from cache")
+    stale: bool = Field(False, description="Whether the cached report was past its TTL (a refresh was started)")
+    age_seconds: int = Field(0, description="Age of the cached report in seconds")
+    status_code: int = Field(200, description="HTTP status the sector would have returned on its own")
+    error: Optional[str] = None
+
+
+class BatchAnalyzeResponse(BaseModel):
+    """Response schema for batch sector analysis."""
+    results: List[BatchAnalyzeItem]
+
+
+class ReportHistoryItem(BaseModel):
+    """Metadata of one stored report."""
+    # model_name is part of the API; allow it despite pydantic's "model_" prefix
+    model_config = ConfigDict(protected_namespaces=())
+
+    id: int
+    generated_at: str = Field(..., description="ISO format timestamp")
+    model_name: str
+    prompt_version: str
+    search_fingerprint: Optional[str] = Field(None, description="SHA-256 of the search results used")
+
+
+class ReportHistoryResponse(BaseModel):
+    """Response schema for a sector's report history."""
+    sector: str
+    reports: List[ReportHistoryItem] = Field(..., description="Stored reports, newest first")
@@ -7,6 +7,12 @@ from .auth import (
     authenticate_user,
 )
 from .rate_limiter import RateLimiter
+from .rate_limit_backends import (
+    RateLimitBackend,
+    InMemoryBackend,
+    SQLiteBackend,
+    RedisBackend,
+)
 
 __all__ = [
     "create_access_token",
@@ -14,5 +20,9 @@ __all__ = [
     "get_current_user",
     "authenticate_user",
     "RateLimiter",
+    "RateLimitBackend",
+    "InMemoryBackend",
+    "SQLiteBackend",
+    "RedisBackend",
 ]
 
@@ -1,27 +1,109 @@
 """JWT authentication implementation."""
 
 import os
+import re
+import logging
+import time
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import secrets
 
-from utils.logger import setup_logger
+from security.keyring import keyring
+from utils.logger import SAMPLED, setup_logger
+from utils.timing import timed_stage
 
 logger = setup_logger()
 
 # JWT Configuration
-# Use environment variable if set, otherwise generate a secure random key
-SECRET_KEY = os.getenv("JWT_SECRET_KEY") or secrets.token_urlsafe(32)
+# Signing keys come from security.keyring (JWT_KEYS, JWT_SECRET_KEY or a shared key file)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Tokens longer than this are rejected before any parsing
+MAX_TOKEN_LENGTH = 4096
+# Three non-empty base64url segments separated by dots
+_TOKEN_SHAPE = re.compile(r"[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+")
+
 # HTTP Bearer token security scheme
 security = HTTPBearer()
 
 
+class _TokenCache:
+    """
+    Bounded cache of verified token payloads keyed on a token digest.
+    
+    Entries expire at the token's ``exp`` claim, so a cached token is never
+    accepted after it would have failed verification. The least recently
+    used entry is evicted once ``max_entries`` is reached.
+    """
+    
+    def __init__(self, max_entries: int = 10_000):
+        """
+        Initialize token cache.
+        
+        Args:
+            max_entries: Maximum number of cached tokens
+        """
+        self.max_entries = max_entries
+        # {token_digest: (payload, exp_timestamp)}
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def digest(token: str) -> bytes:
+        """Hash a token so raw tokens are not kept in memory."""
+        return hashlib.sha256(token.encode("utf-8")).digest()
+    
+    def get(self, key: bytes) -> Optional[dict]:
+        """Get a cached payload if present and not expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, exp = entry
+        if exp <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+    
+    def set(self, key: bytes, payload: dict) -> None:
+        """Cache a verified payload until its exp claim."""
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or self.max_entries <= 0:
+            return
+        self._entries[key] = (payload, float(exp))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached payloads."""
+        self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache statistics."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+# Cache of verified tokens, so repeated requests with the same token skip jwt.decode
+token_cache = _TokenCache(max_entries=int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000")))
+# Tokens signed by a retired key must not outlive it in the cache
+keyring.add_listener(token_cache.clear)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -41,29 +123,69 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    signing_key = keyring.signing_key()
+    encoded_jwt = jwt.encode(
+        to_encode, signing_key.secret, algorithm=ALGORITHM, headers={"kid": signing_key.kid}
+    )
     
-    logger.info(f"Token created for user: {data.get('sub', 'unknown')}")
+    logger.info("Token created for user: %s", data.get("sub", "unknown"), extra=SAMPLED)
     return encoded_jwt
 
 
+def looks_like_jwt(token: str) -> bool:
+    """
+    Cheap structural check run before any decoding or signature verification.
+    
+    Args:
+        token: Bearer token string
+        
+    Returns:
+        True if the token has a plausible JWT shape
+    """
+    return len(token) <= MAX_TOKEN_LENGTH and _TOKEN_SHAPE.fullmatch(token) is not None
+
+
 def verify_token(token: str) -> Optional[dict]:
     """
     Verify and decode a JWT token.
     
+    Malformed tokens are rejected by a structural check first. Verified
+    payloads are cached until the token expires; cache misses run full
+    signature and claims verification.
+    
     Args:
         token: JWT token string
         
     Returns:
         Decoded token payload or None if invalid
     """
+    if not looks_like_jwt(token):
+        logger.debug("Token rejected: malformed")
+        return None
+    
+    cache_key = token_cache.digest(token)
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+    
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logger.debug(f"Token verified successfully for user: {payload.get('sub')}")
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is not None and not isinstance(kid, str):
+            # The header is not verified yet; a list or object kid must not reach the key lookup
+            logger.debug("Token verification failed: invalid key ID")
+            return None
+        secret = keyring.get(kid)
+        if secret is None:
+            logger.debug("Token verification failed: unknown key ID")
+            return None
+        payload = jwt.decode(token, secret, algorithms=[ALGORITHM])
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Token verified successfully for user: %s", payload.get("sub"))
+        token_cache.set(cache_key, payload)
         return payload
     except JWTError as e:
-        logger.warning(f"Token verification failed: {str(e)}")
-        logger.debug(f"Using SECRET_KEY (first 10 chars): {SECRET_KEY[:10]}...")
+        # Failures are routine under bad-token floods; keep them at debug
+        logger.debug("Token verification failed: %s", e)
         return None
 
 
@@ -83,11 +205,10 @@ async def get_current_user(
         HTTPException: If token is invalid or missing
     """
     token = credentials.credentials
-    logger.debug(f"Verifying token (first 20 chars): {token[:20]}...")
-    payload = verify_token(token)
+    with timed_stage("auth", "auth"):
+        payload = verify_token(token)
     
     if payload is None:
-        logger.warning("Authentication failed: Invalid token (token verification returned None)")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials. Token may have expired or server was restarted. Please get a new token.",
@@ -105,7 +226,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    logger.debug(f"User authenticated: {username}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("User authenticated: %s", username)
     return {"username": username, "user_id": user_id}
 
 
@@ -0,0 +1,78 @@
+"""Pre-authentication per-client-IP rate limiting middleware."""
+
+import os
+import json
+from typing import Iterable
+
+from security.rate_limiter import GCRA, RateLimiter
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class IPRateLimitMiddleware:
+    """
+    ASGI middleware that rate-limits requests per client IP.
+
+    It runs before routing and before any authentication dependency, so a
+    flood of requests with bad or missing tokens is rejected without JWT
+    parsing or per-request auth logging. Behind a reverse proxy, run
+    uvicorn with ``--proxy-headers`` so the client IP is the real one.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, exempt_paths: Iterable[str] = ("/health",)):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            limiter: Rate limiter keyed by client IP
+            exempt_paths: Paths that are never limited
+        """
+        self.app = app
+        self.limiter = limiter
+        self.exempt_paths = frozenset(exempt_paths)
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        is_allowed, _, reset_after = await self.limiter.is_allowed(f"ip:{client_ip}")
+        if is_allowed:
+            await self.app(scope, receive, send)
+            return
+
+        self.rejected += 1
+        # Log only every 1000th rejection so floods do not flood the logs too
+        if self.rejected % 1000 == 1:
+            logger.warning("IP rate limit exceeded for %s (%s rejections so far)", client_ip, self.rejected)
+
+        retry_after = str(max(1, reset_after))
+        body = json.dumps({
+            "detail": f"Too many requests from this address. Please try again after {retry_after} seconds.",
+            "status_code": 429,
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", retry_after.encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Global per-IP limiter: in-memory GCRA, generous enough for shared NATs
+ip_rate_limiter = RateLimiter(
+    max_requests=int(os.getenv("IP_RATE_LIMIT_MAX_REQUESTS", "120")),
+    window_seconds=int(os.getenv("IP_RATE_LIMIT_WINDOW_SECONDS", "60")),
+    algorithm=GCRA,
+    burst=int(os.getenv("IP_RATE_LIMIT_BURST", "30")),
+    log_denials=False,
+)
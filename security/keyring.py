@@ -0,0 +1,289 @@
+"""JWT signing keyring with key IDs, shared storage and scheduled rotation."""
+
+import os
+import json
+import time
+import asyncio
+import secrets
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class SigningKey(NamedTuple):
+    """One HMAC signing key."""
+    kid: str
+    secret: str
+    created_at: float
+
+
+class KeyRing:
+    """
+    Set of JWT signing keys shared by every worker.
+
+    The newest key signs new tokens and every retained key verifies. Keys
+    are identified by the ``kid`` token header.
+
+    Keys come from, in order of precedence:
+
+    1. ``JWT_KEYS``: a JSON list of ``{"kid", "secret", "created_at"}`` objects
+    2. ``JWT_SECRET_KEY``: a single key with kid ``"env"``
+    3. A JSON key file (``JWT_KEYRING_PATH``), created on first use
+
+    Keys from the environment are static. With a key file, the first worker
+    creates it under a lock file so all workers agree on the same keys, and
+    rotate() adds a new key and drops old ones once the newest key is older
+    than ``rotation_interval``. Workers notice a rotated file by checking its
+    modification time at most every ``reload_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        path: str = ".jwt_keys.json",
+        rotation_interval: float = 86400.0,
+        retain_keys: int = 3,
+        reload_interval: float = 30.0,
+    ):
+        """
+        Initialize keyring and load keys.
+
+        Args:
+            path: Key file shared by all workers
+            rotation_interval: Seconds a signing key is used before rotation
+            retain_keys: Number of keys kept for verification (including the
+                signing key); retain_keys * rotation_interval must exceed the
+                token lifetime
+            reload_interval: Minimum seconds between key file change checks
+        """
+        self.path = path
+        self.rotation_interval = rotation_interval
+        self.retain_keys = max(1, retain_keys)
+        self.reload_interval = reload_interval
+        self._keys: Dict[str, SigningKey] = {}
+        self._signing_key: Optional[SigningKey] = None
+        self._file_mtime: Optional[float] = None
+        self._last_reload_check = 0.0
+        self._listeners: List[Callable[[], None]] = []
+        self._rotation_task: Optional[asyncio.Task] = None
+        # Loop listeners run on once started; rotation reads files in a worker thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.static = self._load_from_env()
+        if not self.static:
+            self._load_or_create_file()
+
+    def signing_key(self) -> SigningKey:
+        """Get the key used to sign new tokens."""
+        self.maybe_reload()
+        return self._signing_key
+
+    def get(self, kid: Optional[str]) -> Optional[str]:
+        """
+        Get the secret for a key ID.
+
+        Args:
+            kid: Key ID from the token header (None for tokens without one)
+
+        Returns:
+            Secret, or None if the key is unknown
+        """
+        self.maybe_reload()
+        if kid is None:
+            return self._signing_key.secret
+        key = self._keys.get(kid)
+        if key is None and not self.static:
+            # A peer worker may have just rotated; check the file right away
+            self.maybe_reload(force=True)
+            key = self._keys.get(kid)
+        return key.secret if key else None
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback run whenever the set of keys changes.
+
+        After start(), callbacks always run on the event loop, even when the
+        change is picked up by a rotation in a worker thread.
+        """
+        self._listeners.append(callback)
+
+    def maybe_reload(self, force: bool = False) -> None:
+        """Reload the key file if another worker changed it."""
+        if self.static:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < self.reload_interval:
+            return
+        self._last_reload_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._file_mtime:
+            self._read_file()
+
+    def rotate(self, force: bool = False) -> bool:
+        """
+        Add a new signing key if the newest one is due for rotation.
+
+        Args:
+            force: Rotate even if the newest key is not yet due
+
+        Returns:
+            True if a new key was added
+        """
+        if self.static:
+            return False
+        with _FileLock(f"{self.path}.lock"):
+            # Another worker may have rotated already
+            self._read_file()
+            newest = self._signing_key
+            if not force and newest and time.time() - newest.created_at < self.rotation_interval:
+                return False
+            keys = sorted(self._keys.values(), key=lambda k: k.created_at)
+            keys.append(self._new_key())
+            self._write_file(keys[-self.retain_keys:])
+            self._read_file()
+        logger.info("JWT signing key rotated (kid: %s)", self._signing_key.kid)
+        return True
+
+    def start(self) -> None:
+        """Start the background task that rotates keys on schedule."""
+        if self.static or self._rotation_task is not None:
+            return
+        check_interval = min(self.rotation_interval / 10, 300.0)
+        self._loop = asyncio.get_running_loop()
+
+        async def run() -> None:
+            while True:
+                await asyncio.sleep(check_interval)
+                try:
+                    await asyncio.to_thread(self.rotate)
+                except Exception as e:
+                    logger.warning("JWT key rotation failed: %s", e)
+
+        self._rotation_task = asyncio.create_task(run())
+
+    async def close(self) -> None:
+        """Stop the background rotation task."""
+        self._loop = None
+        if self._rotation_task is None:
+            return
+        self._rotation_task.cancel()
+        try:
+            await self._rotation_task
+        except asyncio.CancelledError:
+            pass
+        self._rotation_task = None
+
+    def _load_from_env(self) -> bool:
+        """Load static keys from the environment; return True if any were found."""
+        keys_json = os.getenv("JWT_KEYS")
+        if keys_json:
+            keys = [
+                SigningKey(str(item["kid"]), str(item["secret"]), float(item.get("created_at", 0)))
+                for item in json.loads(keys_json)
+            ]
+            self._set_keys(keys)
+            logger.info("Loaded %s JWT signing keys from JWT_KEYS", len(keys))
+            return True
+
+        secret = os.getenv("JWT_SECRET_KEY")
+        if secret:
+            self._set_keys([SigningKey("env", secret, 0.0)])
+            return True
+        return False
+
+    def _load_or_create_file(self) -> None:
+        """Load the key file, creating it with one key if no worker has yet."""
+        if not os.path.exists(self.path):
+            with _FileLock(f"{self.path}.lock"):
+                if not os.path.exists(self.path):
+                    self._write_file([self._new_key()])
+                    logger.info("Created JWT key file at %s", self.path)
+        self._read_file()
+
+    def _read_file(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            mtime = os.fstat(f.fileno()).st_mtime
+            data = json.load(f)
+        self._file_mtime = mtime
+        self._set_keys([SigningKey(item["kid"], item["secret"], float(item["created_at"])) for item in data])
+
+    def _write_file(self, keys: List[SigningKey]) -> None:
+        # Write atomically and owner-readable only
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([key._asdict() for key in keys], f)
+        os.replace(tmp_path, self.path)
+
+    def _set_keys(self, keys: List[SigningKey]) -> None:
+        if not keys:
+            raise ValueError("JWT keyring has no keys")
+        new_keys = {key.kid: key for key in keys}
+        changed = new_keys != self._keys
+        self._keys = new_keys
+        self._signing_key = max(keys, key=lambda k: k.created_at)
+        if changed:
+            self._notify_listeners()
+
+    def _notify_listeners(self) -> None:
+        """Run the listeners, handing them to the event loop when called from another thread."""
+        try:
+            asyncio.get_running_loop()
+            on_loop = True
+        except RuntimeError:
+            on_loop = False
+        for callback in self._listeners:
+            if on_loop or self._loop is None:
+                callback()
+            else:
+                # Listeners such as token_cache.clear must not race requests on the loop
+                self._loop.call_soon_threadsafe(callback)
+
+    @staticmethod
+    def _new_key() -> SigningKey:
+        return SigningKey(secrets.token_hex(8), secrets.token_urlsafe(32), time.time())
+
+
+class _FileLock:
+    """Cross-process lock using exclusive creation of a lock file."""
+
+    def __init__(self, path: str, timeout: float = 10.0, stale_after: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self.stale_after = stale_after
+
+    def __enter__(self) -> "_FileLock":
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    # Break locks left behind by a crashed worker
+                    if time.time() - os.stat(self.path).st_mtime > self.stale_after:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+# Global keyring shared by token creation and verification
+keyring = KeyRing(
+    path=os.getenv("JWT_KEYRING_PATH", ".jwt_keys.json"),
+    rotation_interval=float(os.getenv("JWT_KEY_ROTATION_SECONDS", "86400")),
+    retain_keys=int(os.getenv("JWT_KEYS_RETAINED", "3")),
+)
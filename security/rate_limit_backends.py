@@ -0,0 +1,857 @@
+"""Storage backends for the rate limiter (sliding window and GCRA)."""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for per-user rate-limit state.
+
+    Backends implement both algorithms: a sliding window (hit/peek) that
+    keeps one timestamp per request, and GCRA (hit_gcra/peek_gcra) that
+    keeps one float per user. Each call checks one user and, for the hit
+    methods, records the request if it is allowed. Implementations must make the check-and-record step
+    atomic with respect to every process sharing the backend.
+    """
+
+    @abstractmethod
+    async def hit(
+        self, user_id: str, max_requests: int, window_seconds: float, cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        """
+        Check a user's window and record the request if it is allowed.
+
+        Args:
+            user_id: Unique user identifier
+            max_requests: Maximum number of requests allowed in the window
+            window_seconds: Window length in seconds
+            cost: Number of requests this call counts as (all or nothing)
+
+        Returns:
+            Tuple of (is_allowed, remaining_requests, reset_after_seconds)
+        """
+
+    @abstractmethod
+    async def peek(self, user_id: str, max_requests: int, window_seconds: float) -> Tuple[int, float]:
+        """
+        Check a user's window without recording a request.
+
+        Args:
+            user_id: Unique user identifier
+            max_requests: Maximum number of requests allowed in the window
+            window_seconds: Window length in seconds
+
+        Returns:
+            Tuple of (remaining_requests, reset_after_seconds)
+        """
+
+    @abstractmethod
+    async def hit_gcra(
+        self, user_id: str, emission_interval: float, burst: int, cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        """
+        Run a GCRA check for a user and record the request if it is allowed.
+
+        Args:
+            user_id: Unique user identifier
+            emission_interval: Seconds per request at the sustained rate
+            burst: Number of requests that may be made back to back
+            cost: Number of requests this call counts as (all or nothing)
+
+        Returns:
+            Tuple of (is_allowed, remaining_requests, reset_after_seconds)
+        """
+
+    @abstractmethod
+    async def peek_gcra(self, user_id: str, emission_interval: float, burst: int) -> Tuple[int, float]:
+        """
+        Run a GCRA check for a user without recording a request.
+
+        Args:
+            user_id: Unique user identifier
+            emission_interval: Seconds per request at the sustained rate
+            burst: Number of requests that may be made back to back
+
+        Returns:
+            Tuple of (remaining_requests, reset_after_seconds)
+        """
+
+    async def sweep(self, window_seconds: float) -> int:
+        """
+        Drop users with no requests left in the window.
+
+        Args:
+            window_seconds: Window length in seconds
+
+        Returns:
+            Number of users dropped
+        """
+        return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get backend statistics.
+
+        Returns:
+            Dictionary of backend-specific statistics
+        """
+        return {}
+
+    async def close(self) -> None:
+        """Release connections and other resources."""
+
+
+def gcra_check(
+    now: float, tat: Optional[float], emission_interval: float, burst: int, cost: int = 1
+) -> Tuple[bool, float, int, float]:
+    """
+    Generic cell rate algorithm step.
+
+    The only state is the theoretical arrival time (TAT): the time at which
+    the user's bucket would be empty again. A request is allowed if, after
+    adding one emission interval per unit of cost, the TAT is at most
+    ``burst`` intervals ahead of now.
+
+    Args:
+        now: Current time in seconds
+        tat: Stored theoretical arrival time (None for a new user)
+        emission_interval: Seconds per request at the sustained rate
+        burst: Number of requests that may be made back to back
+        cost: Number of requests this step counts as
+
+    Returns:
+        Tuple of (is_allowed, new_tat, remaining_requests, reset_after_seconds).
+        new_tat equals the stored TAT when the request is denied.
+    """
+    tat = max(tat or now, now)
+    tolerance = emission_interval * burst
+    new_tat = tat + emission_interval * cost
+    allow_at = new_tat - tolerance
+    if now < allow_at:
+        # Denied: reset_after is the wait until the next request fits
+        return False, tat, 0, allow_at - now
+    remaining = int((tolerance - (new_tat - now)) / emission_interval + 1e-9)
+    return True, new_tat, max(0, remaining), new_tat - now
+
+
+def gcra_peek(now: float, tat: Optional[float], emission_interval: float, burst: int) -> Tuple[int, float]:
+    """
+    Remaining requests and seconds until the bucket is empty, without a request.
+
+    Args:
+        now: Current time in seconds
+        tat: Stored theoretical arrival time (None for a new user)
+        emission_interval: Seconds per request at the sustained rate
+        burst: Number of requests that may be made back to back
+
+    Returns:
+        Tuple of (remaining_requests, reset_after_seconds)
+    """
+    tat = max(tat or now, now)
+    remaining = int((emission_interval * burst - (tat - now)) / emission_interval + 1e-9)
+    return max(0, remaining), tat - now
+
+
+class _NoLock:
+    """Async context manager that does nothing, used in lock-free mode."""
+
+    async def __aenter__(self) -> None:
+        return None
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+class InMemoryBackend(RateLimitBackend):
+    """
+    Per-process in-memory storage.
+
+    Each user has a ring buffer (a deque bounded at ``max_requests``) of
+    monotonic timestamps. Expired timestamps are popped from the front, so
+    each check costs amortized O(1) regardless of ``max_requests``.
+
+    Users hash to one of ``num_stripes`` independent locks, so checks for
+    different users rarely contend. With ``num_stripes=0`` no locks are
+    taken at all: the check never awaits while touching shared state, so
+    the single-threaded event loop already makes it atomic.
+
+    GCRA state is a separate table holding one theoretical arrival time
+    per user.
+
+    The user tables are bounded: sweep() drops users with no requests left in
+    the window, and once ``max_users`` users are tracked the least recently
+    seen user is evicted.
+    """
+
+    def __init__(self, num_stripes: int = 16, max_users: int = 100_000):
+        """
+        Initialize in-memory backend.
+
+        Args:
+            num_stripes: Number of independent locks users are hashed to
+                (0 for lock-free mode)
+            max_users: Maximum number of tracked users before LRU eviction
+        """
+        self.num_stripes = num_stripes
+        self.max_users = max_users
+        # Store request timestamps per user, least recently seen user first:
+        # {user_id: deque([t1, t2, ...])}, oldest timestamp first
+        self._requests: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        # GCRA state: one theoretical arrival time per user, least recently seen first
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self.evicted_idle = 0
+        self.evicted_lru = 0
+        self._locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(num_stripes)]
+        self._no_lock = _NoLock()
+
+    def _lock_for(self, user_id: str) -> Union[asyncio.Lock, _NoLock]:
+        """Get the lock guarding a user's bucket."""
+        if not self._locks:
+            return self._no_lock
+        return self._locks[hash(user_id) % self.num_stripes]
+
+    async def hit(
+        self, user_id: str, max_requests: int, window_seconds: float, cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        async with self._lock_for(user_id):
+            now = time.monotonic()
+            user_requests = self._get_bucket(user_id, max_requests)
+            self._expire(user_requests, now, window_seconds)
+
+            request_count = len(user_requests)
+            is_allowed = request_count + cost <= max_requests
+            if is_allowed:
+                user_requests.extend([now] * cost)
+                remaining = max_requests - request_count - cost
+                return is_allowed, remaining, self._reset_after(user_requests, now, window_seconds)
+
+            # Denied: wait until enough of the oldest requests leave the window
+            needed = request_count + cost - max_requests
+            if needed > request_count:
+                return False, 0, window_seconds
+            return False, 0, max(0.0, user_requests[needed - 1] + window_seconds - now)
+
+    async def peek(self, user_id: str, max_requests: int, window_seconds: float) -> Tuple[int, float]:
+        async with self._lock_for(user_id):
+            now = time.monotonic()
+            # Read-only: do not start tracking users who have made no requests
+            user_requests = self._requests.get(user_id, deque())
+            self._expire(user_requests, now, window_seconds)
+            remaining = max(0, max_requests - len(user_requests))
+            return remaining, self._reset_after(user_requests, now, window_seconds)
+
+    async def hit_gcra(
+        self, user_id: str, emission_interval: float, burst: int, cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        # No awaits between read and write, so no lock is needed
+        now = time.monotonic()
+        is_allowed, new_tat, remaining, reset_after = gcra_check(
+            now, self._tats.get(user_id), emission_interval, burst, cost
+        )
+        if is_allowed:
+            if user_id not in self._tats:
+                while len(self._tats) >= self.max_users:
+                    self._tats.popitem(last=False)
+                    self.evicted_lru += 1
+            self._tats[user_id] = new_tat
+            self._tats.move_to_end(user_id)
+        return is_allowed, remaining, reset_after
+
+    async def peek_gcra(self, user_id: str, emission_interval: float, burst: int) -> Tuple[int, float]:
+        return gcra_peek(time.monotonic(), self._tats.get(user_id), emission_interval, burst)
+
+    async def sweep(self, window_seconds: float) -> int:
+        now = time.monotonic()
+        cutoff_time = now - window_seconds
+        idle_users = [
+            user_id
+            for user_id, user_requests in self._requests.items()
+            if not user_requests or user_requests[-1] <= cutoff_time
+        ]
+        for user_id in idle_users:
+            del self._requests[user_id]
+        # A TAT in the past means the user's bucket is empty again
+        idle_tats = [user_id for user_id, tat in self._tats.items() if tat <= now]
+        for user_id in idle_tats:
+            del self._tats[user_id]
+        evicted = len(idle_users) + len(idle_tats)
+        self.evicted_idle += evicted
+        return evicted
+
+    def get_stats(self) -> Dict[str, Any]:
+        bytes_in_use = sys.getsizeof(self._requests) + sys.getsizeof(self._tats)
+        for user_id, user_requests in self._requests.items():
+            # Each timestamp is a separate float object referenced by the deque
+            bytes_in_use += sys.getsizeof(user_id) + sys.getsizeof(user_requests)
+            bytes_in_use += len(user_requests) * sys.getsizeof(0.0)
+        for user_id in self._tats:
+            bytes_in_use += sys.getsizeof(user_id) + sys.getsizeof(0.0)
+        return {
+            "backend": "memory",
+            "tracked_users": len(self._requests) + len(self._tats),
+            "max_users": self.max_users,
+            "bytes_in_use": bytes_in_use,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru": self.evicted_lru,
+        }
+
+    def _get_bucket(self, user_id: str, max_requests: int) -> Deque[float]:
+        """Get a user's timestamp buffer, creating it and evicting LRU users if needed."""
+        user_requests = self._requests.get(user_id)
+        if user_requests is not None:
+            self._requests.move_to_end(user_id)
+            return user_requests
+
+        while len(self._requests) >= self.max_users:
+            self._requests.popitem(last=False)
+            self.evicted_lru += 1
+
+        user_requests = deque(maxlen=max_requests)
+        self._requests[user_id] = user_requests
+        return user_requests
+
+    @staticmethod
+    def _expire(user_requests: Deque[float], now: float, window_seconds: float) -> None:
+        """Pop timestamps that have left the window from the front of the buffer."""
+        cutoff_time = now - window_seconds
+        while user_requests and user_requests[0] <= cutoff_time:
+            user_requests.popleft()
+
+    @staticmethod
+    def _reset_after(user_requests: Deque[float], now: float, window_seconds: float) -> float:
+        """Seconds until the oldest request in the window expires (0 if none)."""
+        if not user_requests:
+            return 0.0
+        return max(0.0, user_requests[0] + window_seconds - now)
+
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    SQLite storage shared by all workers on one host.
+
+    Each request is a row of (user_id, wall-clock timestamp). The check and
+    insert run in one ``BEGIN IMMEDIATE`` transaction, which takes the
+    database write lock, so concurrent workers never over-admit. Calls run
+    in a worker thread so the event loop is not blocked on disk I/O.
+    """
+
+    def __init__(self, path: str = "rate_limits.sqlite3"):
+        """
+        Initialize SQLite backend.
+
+        Args:
+            path: Database file path shared by all workers
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_hits (user_id TEXT NOT NULL, ts REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_rate_limit_hits_user_ts ON rate_limit_hits (user_id, ts)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_tat (user_id TEXT PRIMARY KEY, tat REAL NOT NULL)"
+        )
+        # One connection shared across threads; serialize access to it
+        self._conn_lock = threading.Lock()
+
+    async def hit(
+        self, user_id: str, max_requests: int, window_seconds: float, cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        return await asyncio.to_thread(self._hit_sync, user_id, max_requests, window_seconds, cost)
+
+    async def peek(self, user_id: str, max_requests: int, window_seconds: float) -> Tuple[int, float]:
+        return await asyncio.to_thread(self._peek_sync, user_id, max_requests, window_seconds)
+
+    async def hit_gcra(
+        self, user_id: str, emission_interval: float, burst: int, cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        return await asyncio.to_thread(self._hit_gcra_sync, user_id, emission_interval, burst, cost)
+
+    async def peek_gcra(self, user_id: str, emission_interval: float, burst: int) -> Tuple[int, float]:
+        return await asyncio.to_thread(self._peek_gcra_sync, user_id, emission_interval, burst)
+
+    async def sweep(self, window_seconds: float) -> int:
+        return await asyncio.to_thread(self._sweep_sync, window_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": self.path}
+
+    async def close(self) -> None:
+        with self._conn_lock:
+            self._conn.close()
+
+    def _hit_sync(
+        self, user_id: str, max_requests: int, window_seconds: float, cost: int
+    ) -> Tuple[bool, int, float]:
+        now = time.time()
+        cutoff_time = now - window_seconds
+        with self._conn_lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.execute(
+                    "DELETE FROM rate_limit_hits WHERE user_id = ? AND ts <= ?", (user_id, cutoff_time)
+                )
+                request_count, oldest = cur.execute(
+                    "SELECT COUNT(*), MIN(ts) FROM rate_limit_hits WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                is_allowed = request_count + cost <= max_requests
+                if is_allowed:
+                    cur.executemany(
+                        "INSERT INTO rate_limit_hits (user_id, ts) VALUES (?, ?)", [(user_id, now)] * cost
+                    )
+                    if oldest is None:
+                        oldest = now
+                else:
+                    # Wait until enough of the oldest requests leave the window
+                    needed = request_count + cost - max_requests
+                    if needed > request_count:
+                        oldest = now
+                    elif needed > 1:
+                        oldest = cur.execute(
+                            "SELECT ts FROM rate_limit_hits WHERE user_id = ? ORDER BY ts LIMIT 1 OFFSET ?",
+                            (user_id, needed - 1),
+                        ).fetchone()[0]
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+        remaining = max_requests - request_count - cost if is_allowed else 0
+        reset_after = max(0.0, oldest + window_seconds - now) if oldest is not None else 0.0
+        return is_allowed, remaining, reset_after
+
+    def _peek_sync(self, user_id: str, max_requests: int, window_seconds: float) -> Tuple[int, float]:
+        now = time.time()
+        with self._conn_lock:
+            request_count, oldest = self._conn.execute(
+                "SELECT COUNT(*), MIN(ts) FROM rate_limit_hits WHERE user_id = ? AND ts > ?",
+                (user_id, now - window_seconds),
+            ).fetchone()
+        reset_after = max(0.0, oldest + window_seconds - now) if oldest is not None else 0.0
+        return max(0, max_requests - request_count), reset_after
+
+    def _hit_gcra_sync(
+        self, user_id: str, emission_interval: float, burst: int, cost: int
+    ) -> Tuple[bool, int, float]:
+        now = time.time()
+        with self._conn_lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                row = cur.execute("SELECT tat FROM rate_limit_tat WHERE user_id = ?", (user_id,)).fetchone()
+                is_allowed, new_tat, remaining, reset_after = gcra_check(
+                    now, row[0] if row else None, emission_interval, burst, cost
+                )
+                if is_allowed:
+                    cur.execute(
+                        "INSERT OR REPLACE INTO rate_limit_tat (user_id, tat) VALUES (?, ?)", (user_id, new_tat)
+                    )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        return is_allowed, remaining, reset_after
+
+    def _peek_gcra_sync(self, user_id: str, emission_interval: float, burst: int) -> Tuple[int, float]:
+        with self._conn_lock:
+            row = self._conn.execute("SELECT tat FROM rate_limit_tat WHERE user_id = ?", (user_id,)).fetchone()
+        return gcra_peek(time.time(), row[0] if row else None, emission_interval, burst)
+
+    def _sweep_sync(self, window_seconds: float) -> int:
+        now = time.time()
+        with self._conn_lock:
+            hits = self._conn.execute("DELETE FROM rate_limit_hits WHERE ts <= ?", (now - window_seconds,))
+            tats = self._conn.execute("DELETE FROM rate_limit_tat WHERE tat <= ?", (now,))
+            return hits.rowcount + tats.rowcount
+
+
+# Sliding-window check as one atomic Redis script over a sorted set of
+# request timestamps. ARGV: now, window, limit, member, record (1 = hit, 0 = peek), cost
+_SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local cost = tonumber(ARGV[6])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+local wait_index = 0
+if count + cost <= limit then
+  allowed = 1
+  if ARGV[5] == '1' then
+    for i = 1, cost do
+      redis.call('ZADD', key, now, ARGV[4] .. ':' .. i)
+    end
+    redis.call('PEXPIRE', key, math.ceil(window * 1000))
+    count = count + cost
+  end
+elseif ARGV[5] == '1' then
+  if count + cost - limit > count then
+    return {0, 0, tostring(window)}
+  end
+  wait_index = count + cost - limit - 1
+end
+local reset_after = 0
+local oldest = redis.call('ZRANGE', key, wait_index, wait_index, 'WITHSCORES')
+if oldest[2] then
+  reset_after = tonumber(oldest[2]) + window - now
+end
+return {allowed, limit - count, tostring(reset_after)}
+"""
+
+
+# GCRA check as one atomic Redis script over a single stored TAT per user.
+# ARGV: now, emission_interval, burst, record (1 = hit, 0 = peek), cost
+_GCRA_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local tolerance = interval * burst
+local tat = tonumber(redis.call('GET', key) or now)
+if tat < now then
+  tat = now
+end
+if ARGV[4] == '0' then
+  local remaining = math.floor((tolerance - (tat - now)) / interval + 1e-9)
+  return {1, math.max(0, remaining), tostring(tat - now)}
+end
+local new_tat = tat + interval * tonumber(ARGV[5])
+local allow_at = new_tat - tolerance
+if now < allow_at then
+  return {0, 0, tostring(allow_at - now)}
+end
+redis.call('SET', key, tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+local remaining = math.floor((tolerance - (new_tat - now)) / interval + 1e-9)
+return {1, math.max(0, remaining), tostring(new_tat - now)}
+"""
+
+
+class BackendUnavailableError(Exception):
+    """The rate-limit store could not be reached or did not answer in time."""
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class _RespClient:
+    """Minimal Redis (RESP2) client over one asyncio connection."""
+
+    def __init__(
+        self, host: str, port: int, db: int = 0, password: Optional[str] = None, timeout: float = 1.0
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def execute(self, *args: Union[str, bytes, int, float]) -> Any:
+        """
+        Send one command and read its reply.
+
+        Connecting (if needed), sending and reading the reply must finish
+        within ``timeout`` seconds, or asyncio.TimeoutError is raised.
+        """
+        async with self._lock:
+            try:
+                return await asyncio.wait_for(self._execute(args), self.timeout)
+            except RespError:
+                raise
+            except BaseException:
+                # Also on timeout and cancellation: an unread reply would
+                # otherwise be returned to the next command on this connection
+                self._abort()
+                raise
+
+    async def _execute(self, args: Tuple[Union[str, bytes, int, float], ...]) -> Any:
+        if self._writer is None:
+            await self._connect()
+        self._writer.write(self._encode(args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def close(self) -> None:
+        """Close the connection."""
+        async with self._lock:
+            await self._disconnect()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                self._writer.write(self._encode(("AUTH", self.password)))
+                await self._read_reply()
+            if self.db:
+                self._writer.write(self._encode(("SELECT", self.db)))
+                await self._read_reply()
+        except BaseException:
+            self._abort()
+            raise
+
+    def _abort(self) -> None:
+        """Drop the connection without waiting, so it is safe while being cancelled."""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _disconnect(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        self._reader = self._writer = None
+
+    @staticmethod
+    def _encode(args: Tuple[Union[str, bytes, int, float], ...]) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readuntil(b"\r\n")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RespError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode("utf-8")
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RespError(f"Unexpected reply type: {line!r}")
+
+
+class _RespPool:
+    """Fixed number of RESP connections to one server, each running one command at a time."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int = 0,
+        password: Optional[str] = None,
+        size: int = 4,
+        timeout: float = 1.0,
+    ):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._clients = [_RespClient(host, port, db, password, timeout) for _ in range(self.size)]
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for client in self._clients:
+            self._idle.put_nowait(client)
+
+    async def execute(self, *args: Union[str, bytes, int, float]) -> Any:
+        """Run one command on an idle connection, waiting at most ``timeout`` for one."""
+        client = await asyncio.wait_for(self._idle.get(), self.timeout)
+        try:
+            return await client.execute(*args)
+        finally:
+            self._idle.put_nowait(client)
+
+    async def close(self) -> None:
+        """Close every connection."""
+        for client in self._clients:
+            await client.close()
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Redis storage shared by workers on any number of hosts.
+
+    Each user's window is a sorted set of request timestamps. The expire,
+    count and record steps run in one server-side script (EVALSHA), so a
+    check is a single atomic round-trip. Any server that speaks the Redis
+    protocol and supports scripting can be used.
+
+    Commands run over a pool of ``pool_size`` connections. Waiting for a
+    connection and running a command are each bounded by ``timeout``
+    seconds; a connection whose command times out is dropped and reopened
+    on next use. An unreachable or unresponsive server raises
+    BackendUnavailableError, so the limiter fails closed: no check is
+    treated as allowed while the server is down.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        key_prefix: str = "ratelimit:",
+        pool_size: int = 4,
+        timeout: float = 1.0,
+    ):
+        """
+        Initialize Redis backend.
+
+        Args:
+            url: Server URL (redis://[:password@]host:port/db)
+            key_prefix: Prefix for per-user keys
+            pool_size: Connections per process
+            timeout: Seconds allowed to get a connection and, separately,
+                to connect and run one command
+        """
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        self.url = url
+        self.key_prefix = key_prefix
+        self._client = _RespPool(
+            parsed.hostname or "localhost", parsed.port or 6379, db, parsed.password, pool_size, timeout
+        )
+        self._script_shas = {
+            script: hashlib.sha1(script.encode("utf-8")).hexdigest()
+            for script in (_SLIDING_WINDOW_SCRIPT, _GCRA_SCRIPT)
+        }
+
+    async def hit(
+        self, user_id: str, max_requests: int, window_seconds: float, cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        allowed, remaining, reset_after = await self._run_sliding_window(
+            user_id, max_requests, window_seconds, record=True, cost=cost
+        )
+        # A denied batch can leave some capacity, but none is usable by it
+        return bool(allowed), max(0, int(remaining)) if allowed else 0, float(reset_after)
+
+    async def peek(self, user_id: str, max_requests: int, window_seconds: float) -> Tuple[int, float]:
+        _, remaining, reset_after = await self._run_sliding_window(
+            user_id, max_requests, window_seconds, record=False
+        )
+        return max(0, int(remaining)), float(reset_after)
+
+    async def hit_gcra(
+        self, user_id: str, emission_interval: float, burst: int, cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        allowed, remaining, reset_after = await self._eval(
+            _GCRA_SCRIPT,
+            f"{self.key_prefix}gcra:{user_id}",
+            repr(time.time()),
+            repr(float(emission_interval)),
+            burst,
+            "1",
+            cost,
+        )
+        return bool(allowed), int(remaining), float(reset_after)
+
+    async def peek_gcra(self, user_id: str, emission_interval: float, burst: int) -> Tuple[int, float]:
+        _, remaining, reset_after = await self._eval(
+            _GCRA_SCRIPT,
+            f"{self.key_prefix}gcra:{user_id}",
+            repr(time.time()),
+            repr(float(emission_interval)),
+            burst,
+            "0",
+            1,
+        )
+        return int(remaining), float(reset_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "url": self._redacted_url(),
+            "pool_size": self._client.size,
+            "timeout_seconds": self._client.timeout,
+        }
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    async def _run_sliding_window(
+        self, user_id: str, max_requests: int, window_seconds: float, record: bool, cost: int = 1
+    ) -> List[Any]:
+        """Run the sliding-window script for a user."""
+        # The member must be unique so two hits at the same instant both count
+        return await self._eval(
+            _SLIDING_WINDOW_SCRIPT,
+            f"{self.key_prefix}{user_id}",
+            repr(time.time()),
+            repr(float(window_seconds)),
+            max_requests,
+            uuid.uuid4().hex,
+            "1" if record else "0",
+            cost,
+        )
+
+    async def _eval(self, script: str, key: str, *argv: Union[str, int, float]) -> List[Any]:
+        """Run a single-key script, loading it on the server if needed."""
+        args = (1, key) + argv
+        try:
+            try:
+                return await self._client.execute("EVALSHA", self._script_shas[script], *args)
+            except RespError as e:
+                if not str(e).startswith("NOSCRIPT"):
+                    raise
+                return await self._client.execute("EVAL", script, *args)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError) as e:
+            raise BackendUnavailableError(f"Redis at {self._redacted_url()} is unavailable: {e!r}") from e
+
+    def _redacted_url(self) -> str:
+        """Server URL without the password."""
+        parsed = urlparse(self.url)
+        if parsed.password:
+            return self.url.replace(f":{parsed.password}@", ":***@")
+        return self.url
+
+
+def create_backend_from_env() -> RateLimitBackend:
+    """
+    Build a backend from environment variables.
+
+    RATE_LIMIT_BACKEND selects ``memory`` (default), ``sqlite`` (path from
+    RATE_LIMIT_SQLITE_PATH) or ``redis`` (URL from RATE_LIMIT_REDIS_URL,
+    connections per process from RATE_LIMIT_REDIS_POOL_SIZE and timeout
+    from RATE_LIMIT_REDIS_TIMEOUT_SECONDS).
+
+    Returns:
+        Configured backend
+
+    Raises:
+        ValueError: If RATE_LIMIT_BACKEND is not a known backend
+    """
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend == "memory":
+        return InMemoryBackend(max_users=int(os.getenv("RATE_LIMIT_MAX_TRACKED_USERS", "100000")))
+    if backend == "sqlite":
+        return SQLiteBackend(os.getenv("RATE_LIMIT_SQLITE_PATH", "rate_limits.sqlite3"))
+    if backend == "redis":
+        return RedisBackend(
+            os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0"),
+            pool_size=int(os.getenv("RATE_LIMIT_REDIS_POOL_SIZE", "4")),
+            timeout=float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", "1")),
+        )
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
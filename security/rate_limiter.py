@@ -1,75 +1,126 @@
-"""In-memory rate limiter implementation."""
+"""Rate limiter with selectable algorithm and pluggable storage backends."""
 
-from datetime import datetime, timedelta
-from typing import Dict, Tuple
-from collections import defaultdict
+import os
+import math
+import logging
 import asyncio
+from typing import Any, Dict, Optional, Tuple
 
+from security.rate_limit_backends import InMemoryBackend, RateLimitBackend, create_backend_from_env
 from utils.logger import setup_logger
 
 logger = setup_logger()
 
 
+# Supported algorithms
+SLIDING_WINDOW = "sliding_window"
+GCRA = "gcra"
+
+
 class RateLimiter:
     """
-    In-memory rate limiter using token bucket algorithm.
-    Thread-safe using asyncio locks.
+    Per-user rate limiter.
+    
+    Two algorithms are available per instance:
+    
+    - ``sliding_window``: exact count of requests in the last
+      ``window_seconds``; stores one timestamp per request.
+    - ``gcra``: generic cell rate algorithm; admits ``max_requests`` per
+      ``window_seconds`` on average with bursts of up to ``burst``
+      requests, and stores a single float per user.
+    
+    State is kept in a RateLimitBackend. The default in-memory
+    backend is per-process; use the SQLite backend to share limits between
+    workers on one host, or the Redis backend to share them across hosts.
     """
     
-    def __init__(self, max_requests: int = 10, window_seconds: int = 60):
+    def __init__(
+        self,
+        max_requests: int = 10,
+        window_seconds: int = 60,
+        num_stripes: int = 16,
+        max_users: int = 100_000,
+        backend: Optional[RateLimitBackend] = None,
+        algorithm: str = SLIDING_WINDOW,
+        burst: Optional[int] = None,
+        log_denials: bool = True,
+    ):
         """
         Initialize rate limiter.
         
         Args:
             max_requests: Maximum number of requests allowed in the time window
             window_seconds: Time window in seconds
+            num_stripes: Number of independent locks users are hashed to
+                (0 for lock-free mode; in-memory backend only)
+            max_users: Maximum number of tracked users before LRU eviction
+                (in-memory backend only)
+            backend: Storage backend (if None, an InMemoryBackend is created)
+            algorithm: ``"sliding_window"`` or ``"gcra"``
+            burst: Requests allowed back to back in GCRA mode (default: max_requests)
+            log_denials: Log a warning for every denied request
+            
+        Raises:
+            ValueError: If the algorithm is not supported
         """
+        if algorithm not in (SLIDING_WINDOW, GCRA):
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        # Store request timestamps per user: {user_id: [timestamp1, timestamp2, ...]}
-        self._requests: Dict[str, list] = defaultdict(list)
-        self._lock = asyncio.Lock()
-        logger.info(f"Rate limiter initialized: {max_requests} requests per {window_seconds} seconds")
+        self.algorithm = algorithm
+        self.burst = burst or max_requests
+        self.log_denials = log_denials
+        # GCRA: seconds between requests at the sustained rate
+        self.emission_interval = window_seconds / max_requests
+        self.backend = backend or InMemoryBackend(num_stripes=num_stripes, max_users=max_users)
+        self._sweeper_task: Optional[asyncio.Task] = None
+        logger.info(
+            "Rate limiter initialized: %s requests per %s seconds (%s, %s)",
+            max_requests, window_seconds, self.algorithm, type(self.backend).__name__,
+        )
+    
+    @property
+    def max_cost(self) -> int:
+        """
+        Largest cost a single check can ever admit.
+        
+        A check costing more is denied even for an idle user: the whole
+        window (sliding window) or burst (GCRA) is too small for it.
+        """
+        return self.burst if self.algorithm == GCRA else self.max_requests
     
-    async def is_allowed(self, user_id: str) -> Tuple[bool, int, int]:
+    async def is_allowed(self, user_id: str, cost: int = 1) -> Tuple[bool, int, int]:
         """
         Check if a request is allowed for the given user.
         
         Args:
             user_id: Unique user identifier
+            cost: Number of requests to charge, e.g. one per sector in a batch;
+                either all are admitted or none are. A cost above max_cost
+                is never admitted.
             
         Returns:
             Tuple of (is_allowed, remaining_requests, reset_after_seconds)
         """
-        async with self._lock:
-            now = datetime.now()
-            cutoff_time = now - timedelta(seconds=self.window_seconds)
-            
-            # Clean up old requests outside the time window
-            user_requests = self._requests[user_id]
-            user_requests[:] = [req_time for req_time in user_requests if req_time > cutoff_time]
-            
-            # Check if limit exceeded
-            request_count = len(user_requests)
-            remaining = max(0, self.max_requests - request_count)
-            is_allowed = request_count < self.max_requests
-            
-            if is_allowed:
-                # Add current request timestamp
-                user_requests.append(now)
-                logger.debug(f"Rate limit check passed for user {user_id}: {remaining - 1} requests remaining")
-            else:
-                # Calculate reset time (oldest request + window)
-                if user_requests:
-                    oldest_request = min(user_requests)
-                    reset_time = oldest_request + timedelta(seconds=self.window_seconds)
-                    reset_after = max(0, int((reset_time - now).total_seconds()))
-                else:
-                    reset_after = self.window_seconds
-                
-                logger.warning(f"Rate limit exceeded for user {user_id}. Resets in {reset_after} seconds")
-            
-            return is_allowed, remaining, self.window_seconds
+        if self.algorithm == GCRA:
+            is_allowed, remaining, reset_after = await self.backend.hit_gcra(
+                user_id, self.emission_interval, self.burst, cost
+            )
+        else:
+            is_allowed, remaining, reset_after = await self.backend.hit(
+                user_id, self.max_requests, self.window_seconds, cost
+            )
+        # Seconds until the oldest request leaves the window (sliding window),
+        # or until the next request is admitted / the bucket is empty (GCRA)
+        reset_after = math.ceil(reset_after)
+        
+        if is_allowed:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Rate limit check passed for user %s: %s requests remaining", user_id, remaining)
+        elif self.log_denials:
+            logger.warning("Rate limit exceeded for user %s. Resets in %s seconds", user_id, reset_after)
+        
+        return is_allowed, remaining, reset_after
     
     async def get_rate_limit_info(self, user_id: str) -> Dict[str, int]:
         """
@@ -81,24 +132,84 @@ class RateLimiter:
         Returns:
             Dictionary with rate limit info
         """
-        async with self._lock:
-            now = datetime.now()
-            cutoff_time = now - timedelta(seconds=self.window_seconds)
-            
-            user_requests = self._requests[user_id]
-            user_requests[:] = [req_time for req_time in user_requests if req_time > cutoff_time]
-            
-            request_count = len(user_requests)
-            remaining = max(0, self.max_requests - request_count)
-            
-            return {
-                "limit": self.max_requests,
-                "remaining": remaining,
-                "reset_after": self.window_seconds,
-            }
+        if self.algorithm == GCRA:
+            remaining, reset_after = await self.backend.peek_gcra(user_id, self.emission_interval, self.burst)
+        else:
+            remaining, reset_after = await self.backend.peek(user_id, self.max_requests, self.window_seconds)
+        return {
+            "limit": self.max_requests,
+            "remaining": remaining,
+            "reset_after": math.ceil(reset_after),
+        }
+    
+    async def sweep(self) -> int:
+        """
+        Evict users with no requests left in the window.
+        
+        Returns:
+            Number of users evicted
+        """
+        evicted = await self.backend.sweep(self.window_seconds)
+        if evicted:
+            logger.debug("Rate limiter evicted %s idle users", evicted)
+        return evicted
+    
+    def start(self, sweep_interval_seconds: Optional[float] = None) -> None:
+        """
+        Start the background task that evicts idle users.
+        
+        Args:
+            sweep_interval_seconds: Seconds between sweeps (default: the window length)
+        """
+        if self._sweeper_task is not None:
+            return
+        interval = sweep_interval_seconds or self.window_seconds
+        
+        async def run() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.sweep()
+                except Exception as e:
+                    logger.warning("Rate limiter sweep failed: %s", e)
+        
+        self._sweeper_task = asyncio.create_task(run())
+    
+    async def close(self) -> None:
+        """Stop the background sweeper and close the backend."""
+        if self._sweeper_task is not None:
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+            self._sweeper_task = None
+        await self.backend.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get rate limiter statistics.
+        
+        Returns:
+            Dictionary with limit settings and backend statistics
+        """
+        stats: Dict[str, Any] = {
+            "algorithm": self.algorithm,
+            "max_requests": self.max_requests,
+            "window_seconds": self.window_seconds,
+        }
+        if self.algorithm == GCRA:
+            stats["burst"] = self.burst
+        stats.update(self.backend.get_stats())
+        return stats
 
 
 # Global rate limiter instance
-# Default: 10 requests per minute per user
-rate_limiter = RateLimiter(max_requests=10, window_seconds=60)
-
+# Default: 10 requests per minute per user, storage selected by RATE_LIMIT_BACKEND
+rate_limiter = RateLimiter(
+    max_requests=int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "10")),
+    window_seconds=int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60")),
+    backend=create_backend_from_env(),
+    algorithm=os.getenv("RATE_LIMIT_ALGORITHM", SLIDING_WINDOW),
+    burst=int(os.getenv("RATE_LIMIT_BURST", "0")) or None,
+)
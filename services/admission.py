@@ -0,0 +1,170 @@
+"""Global Gemini concurrency limiter with per-user fair queuing."""
+
+import asyncio
+import math
+import os
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class AdmissionTimeoutError(Exception):
+    """Raised when a request waits longer than the maximum queue wait for a slot."""
+
+    def __init__(self, retry_after: int):
+        """
+        Initialize error.
+
+        Args:
+            retry_after: Suggested seconds before the client retries
+        """
+        super().__init__(f"Gemini capacity exhausted; retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class FairAdmissionController:
+    """
+    Cap in-flight Gemini generations and hand out free slots fairly.
+
+    Waiting requests are queued per user, and slots are granted round-robin
+    across users, so one user with many queued requests cannot take every
+    slot. A request that waits longer than ``max_queue_wait`` seconds is
+    rejected with AdmissionTimeoutError.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queue_wait: float = 30.0):
+        """
+        Initialize admission controller.
+
+        Args:
+            max_concurrent: Maximum number of concurrent Gemini generations
+            max_queue_wait: Maximum seconds a request may wait for a slot
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue_wait = max_queue_wait
+        self._active = 0
+        # Waiting requests in round-robin order: {user_id: deque of futures}
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.admitted = 0
+        self.rejected = 0
+        logger.info(
+            "Gemini admission controller initialized: max_concurrent=%s, max_queue_wait=%ss",
+            max_concurrent, max_queue_wait,
+        )
+
+    @asynccontextmanager
+    async def slot(self, user_id: str) -> AsyncIterator[None]:
+        """
+        Hold a generation slot for the duration of the block.
+
+        Args:
+            user_id: User the generation is charged to
+
+        Raises:
+            AdmissionTimeoutError: If no slot frees up within max_queue_wait
+        """
+        await self.acquire(user_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, user_id: str) -> None:
+        """
+        Wait for a generation slot.
+
+        Args:
+            user_id: User the generation is charged to
+
+        Raises:
+            AdmissionTimeoutError: If no slot frees up within max_queue_wait
+        """
+        if self._active < self.max_concurrent and not self._queues:
+            self._active += 1
+            self.admitted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user_id, deque()).append(future)
+
+        try:
+            await asyncio.wait({future}, timeout=self.max_queue_wait)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as the caller was cancelled
+                self.release()
+            else:
+                self._discard(user_id, future)
+            raise
+
+        if future.done():
+            return
+
+        self._discard(user_id, future)
+        self.rejected += 1
+        retry_after = max(1, math.ceil(self.max_queue_wait))
+        logger.warning("Gemini admission timed out for user %s after %ss", user_id, self.max_queue_wait)
+        raise AdmissionTimeoutError(retry_after)
+
+    def release(self) -> None:
+        """Release a generation slot and grant it to the next waiting user."""
+        self._active -= 1
+        self._dispatch()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get admission statistics.
+
+        Returns:
+            Dictionary with active, queued and rejected counts
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "users_waiting": len(self._queues),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting requests, one user at a time."""
+        while self._active < self.max_concurrent and self._queues:
+            user_id, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                # Send this user to the back of the round-robin order
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+
+            if future.done():
+                continue
+
+            future.set_result(None)
+            self._active += 1
+            self.admitted += 1
+
+    def _discard(self, user_id: str, future: asyncio.Future) -> None:
+        """Remove a waiting request that gave up."""
+        future.cancel()
+        queue = self._queues.get(user_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[user_id]
+
+
+# Global admission controller shared by all AIService instances
+gemini_admission = FairAdmissionController(
+    max_concurrent=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+    max_queue_wait=float(os.getenv("GEMINI_MAX_QUEUE_WAIT_SECONDS", "30")),
+)
@@ -1,25 +1,60 @@
 """AI service for generating market analysis reports using Google Gemini API."""
 
 import os
+import re
+import json
+import time
 import asyncio
+import hashlib
 import google.generativeai as genai
-from typing import List, Dict, Optional
+import threading
+from typing import Any, AsyncIterator, List, Dict, Optional
 from datetime import datetime
 
-from utils.logger import setup_logger
+from services.admission import AdmissionTimeoutError, FairAdmissionController, gemini_admission
+from utils.executor import MeteredThreadPoolExecutor
+from utils.logger import SAMPLED, setup_logger
+from utils.metrics import error_reports, gemini_errors
+from utils.timing import record_stage, timed_stage
 
 logger = setup_logger()
 
+# Bump whenever _create_prompt changes so cached reports are invalidated
+PROMPT_VERSION = "1"
+
+# Marker included in reports produced by _generate_error_report
+ERROR_REPORT_MARKER = "**Note**: This is an error report."
+
+# Most sectors packed into one multi-sector prompt (bounded by output tokens)
+MULTI_SECTOR_MAX = max(1, int(os.getenv("GEMINI_MULTI_SECTOR_MAX", "4")))
+
+# Delimiters around each sector's report in multi-sector prompts and output
+SECTOR_BEGIN = "=== BEGIN SECTOR: {sector} ==="
+SECTOR_END = "=== END SECTOR: {sector} ==="
+_SECTOR_DELIMITER = re.compile(r"^[ \t]*=== (BEGIN|END) SECTOR: (.+?) ===[ \t]*$", re.MULTILINE)
+
 
 class AIService:
     """Service for generating market analysis reports using Google Gemini."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        executor: Optional[MeteredThreadPoolExecutor] = None,
+        admission: Optional[FairAdmissionController] = None,
+        model: Optional[Any] = None,
+    ):
         """
         Initialize AI service with Gemini API.
         
         Args:
             api_key: Google Gemini API key (if None, reads from env)
+            executor: Dedicated executor for blocking Gemini calls
+                (if None, one is created with GEMINI_EXECUTOR_WORKERS threads)
+            admission: Concurrency limiter for Gemini calls
+                (if None, the global gemini_admission controller is used)
+            model: Preconfigured model exposing the GenerativeModel generation
+                methods (if None, one is discovered via the Gemini API)
         """
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         
@@ -29,26 +64,39 @@ class AIService:
                 "Please set it in your .env file or environment."
             )
         
+        if model is not None:
+            self.model = model
+            self.model_name_used = getattr(model, "model_name", type(model).__name__)
+        else:
+            self._select_model()
+        
+        # Prefer the SDK's native async generation; fall back to a dedicated
+        # thread pool so blocking calls never occupy the default executor
+        use_async = os.getenv("GEMINI_USE_ASYNC", "true").lower() in ("1", "true", "yes")
+        self.use_async = use_async and hasattr(self.model, "generate_content_async")
+        self.executor = executor or MeteredThreadPoolExecutor(
+            max_workers=int(os.getenv("GEMINI_EXECUTOR_WORKERS", "8")),
+            thread_name_prefix="gemini",
+        )
+        logger.info("Gemini generation mode: %s", "native async" if self.use_async else "executor")
+        self.admission = admission or gemini_admission
+    
+    def _select_model(self) -> None:
+        """
+        Configure Gemini and pick the first model that initializes.
+        
+        Raises:
+            ValueError: If no model could be initialized
+        """
         # Configure Gemini
         genai.configure(api_key=self.api_key)
         
-        # First, try to list available models to find what's actually available
-        available_model_names = []
-        available_models_full = []
-        try:
-            models = genai.list_models()
-            for model in models:
-                if 'generateContent' in model.supported_generation_methods:
-                    # Keep both full name and clean name
-                    model_name_clean = model.name.replace('models/', '')
-                    available_model_names.append(model_name_clean)
-                    available_models_full.append(model.name)
-            logger.info(f"Available Gemini models (clean): {available_model_names}")
-            logger.info(f"Available Gemini models (full): {available_models_full}")
-        except Exception as e:
-            logger.warning(f"Could not list available models: {str(e)}")
-            available_model_names = []
-            available_models_full = []
+        # First, find out which models are actually available (cached on disk)
+        available_models_full = self._discover_models()
+        available_model_names = [name.replace('models/', '') for name in available_models_full]
+        if available_models_full:
+            logger.info("Available Gemini models (clean): %s", available_model_names)
+            logger.info("Available Gemini models (full): %s", available_models_full)
         
         # Use environment variable for model name, default to gemini-pro (most commonly available)
         # Strip "gemini/" prefix if present (REST API format vs Python SDK format)
@@ -88,13 +136,13 @@ class AIService:
             try:
                 # Try with the exact name from list_models first
                 self.model = genai.GenerativeModel(try_model)
-                logger.info(f"AI service initialized with Gemini API (model: {try_model})")
+                logger.info("AI service initialized with Gemini API (model: %s)", try_model)
                 model_initialized = True
                 self.model_name_used = try_model
                 break
             except Exception as e:
                 last_error = e
-                logger.debug(f"Failed to initialize model '{try_model}': {str(e)}")
+                logger.debug("Failed to initialize model '%s': %s", try_model, e)
                 continue
         
         if not model_initialized:
@@ -104,8 +152,61 @@ class AIService:
             logger.error(error_msg)
             raise ValueError(error_msg)
     
+    def _discover_models(self) -> List[str]:
+        """
+        List Gemini models that support generateContent.
+        
+        Results are cached on disk at GEMINI_MODEL_CACHE_PATH for
+        GEMINI_MODEL_CACHE_TTL_SECONDS, keyed on a hash of the API key, so
+        restarts and additional workers skip the list_models() round-trip.
+        
+        Returns:
+            Full model names (e.g. "models/gemini-pro"), or an empty list if
+            they could not be listed
+        """
+        cache_path = os.getenv("GEMINI_MODEL_CACHE_PATH", ".gemini_models.json")
+        cache_ttl = float(os.getenv("GEMINI_MODEL_CACHE_TTL_SECONDS", "86400"))
+        key_hash = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:16]
+        
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if (
+                cached.get("key_hash") == key_hash
+                and time.time() - cached.get("fetched_at", 0) < cache_ttl
+                and cached.get("models")
+            ):
+                logger.info("Using cached Gemini model list from %s", cache_path)
+                return list(cached["models"])
+        except (OSError, ValueError):
+            pass
+        
+        available_models_full = []
+        try:
+            models = genai.list_models()
+            for model in models:
+                if 'generateContent' in model.supported_generation_methods:
+                    available_models_full.append(model.name)
+        except Exception as e:
+            logger.warning("Could not list available models: %s", e)
+            return []
+        
+        try:
+            # Write atomically so concurrent workers never read a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"key_hash": key_hash, "fetched_at": time.time(), "models": available_models_full},
+                    f,
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("Could not write Gemini model cache: %s", e)
+        
+        return available_models_full
+    
     async def generate_market_report(
-        self, sector: str, market_data: List[Dict[str, str]]
+        self, sector: str, market_data: List[Dict[str, str]], user_id: str = "anonymous"
     ) -> str:
         """
         Generate a structured Markdown market analysis report.
@@ -113,9 +214,13 @@ class AIService:
         Args:
             sector: Sector name to analyze
             market_data: List of market data and news snippets
+            user_id: User the Gemini call is queued under for fair admission
             
         Returns:
             Structured Markdown report string
+            
+        Raises:
+            AdmissionTimeoutError: If no Gemini slot frees up in time
         """
         try:
             # Build context from market data
@@ -124,31 +229,287 @@ class AIService:
             # Create prompt for Gemini
             prompt = self._create_prompt(sector, context)
             
-            logger.info(f"Generating market report for sector: {sector}")
-            
-            # Generate response using Gemini (run in executor to avoid blocking)
-            loop = asyncio.get_running_loop()
-            response = await loop.run_in_executor(
-                None, self.model.generate_content, prompt
-            )
+            logger.info("Generating market report for sector: %s", sector, extra=SAMPLED)
             
-            # Extract text from response
-            report = response.text if hasattr(response, "text") else str(response)
+            # Generate response using Gemini, within the global concurrency cap
+            queued_at = time.perf_counter()
+            async with self.admission.slot(user_id):
+                record_stage("admission", time.perf_counter() - queued_at, "queue")
+                with timed_stage("generation", "llm"):
+                    response = await self._generate_content(prompt)
             
-            # Ensure report follows the required structure
-            report = self._ensure_report_structure(report, sector)
+            with timed_stage("postprocess", "postprocess"):
+                # Extract text from response
+                report = response.text if hasattr(response, "text") else str(response)
+                
+                # Ensure report follows the required structure
+                report = self._ensure_report_structure(report, sector)
             
-            logger.info(f"Market report generated successfully for sector: {sector}")
+            logger.info("Market report generated successfully for sector: %s", sector, extra=SAMPLED)
             return report
             
+        except AdmissionTimeoutError:
+            # Let the caller turn this into a 503 rather than an error report
+            raise
         except Exception as e:
             error_msg = str(e)
             error_type = type(e).__name__
-            logger.error(f"Failed to generate report for sector {sector}: {error_type}: {error_msg}")
-            logger.error(f"Full error details: {repr(e)}")
+            gemini_errors.inc(error_type=error_type)
+            logger.error("Failed to generate report for sector %s: %s: %s", sector, error_type, error_msg)
+            logger.error("Full error details: %r", e)
             # Return a structured error report with detailed error info
             return self._generate_error_report(sector, f"{error_type}: {error_msg}")
     
+    async def stream_market_report(
+        self, sector: str, market_data: List[Dict[str, str]], user_id: str = "anonymous"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a market report, yielding Markdown chunks as Gemini produces them.
+        
+        Yields ``{"event": "chunk", "text": ...}`` for each streamed chunk and
+        finishes with a single ``{"event": "done", ...}`` carrying the full
+        structured report, the ``prefix``/``suffix`` added by
+        _ensure_report_structure and an ``error`` flag. On failure the done
+        event carries an error report instead.
+        
+        Args:
+            sector: Sector name to analyze
+            market_data: List of market data and news snippets
+            user_id: User the Gemini call is queued under for fair admission
+            
+        Yields:
+            Event dictionaries
+            
+        Raises:
+            AdmissionTimeoutError: If no Gemini slot frees up in time
+        """
+        context = self._build_context(sector, market_data)
+        prompt = self._create_prompt(sector, context)
+        
+        logger.info("Streaming market report for sector: %s", sector, extra=SAMPLED)
+        
+        parts: List[str] = []
+        error: Optional[Exception] = None
+        
+        queued_at = time.perf_counter()
+        async with self.admission.slot(user_id):
+            record_stage("admission", time.perf_counter() - queued_at, "queue")
+            chunks = self._stream_content(prompt)
+            try:
+                with timed_stage("generation", "llm"):
+                    async for text in chunks:
+                        parts.append(text)
+                        yield {"event": "chunk", "text": text}
+            except Exception as e:
+                error = e
+            finally:
+                # Stop the underlying stream if the client went away mid-stream
+                await chunks.aclose()
+        
+        if error is not None:
+            error_type = type(error).__name__
+            gemini_errors.inc(error_type=error_type)
+            logger.error("Failed to stream report for sector %s: %s: %s", sector, error_type, error)
+            report = self._generate_error_report(sector, f"{error_type}: {error}")
+            yield {"event": "done", "report": report, "prefix": "", "suffix": "", "error": True}
+            return
+        
+        with timed_stage("postprocess", "postprocess"):
+            raw = "".join(parts)
+            report = self._ensure_report_structure(raw, sector)
+            start = report.find(raw) if raw else len(report)
+        
+        logger.info("Market report streamed successfully for sector: %s", sector, extra=SAMPLED)
+        yield {
+            "event": "done",
+            "report": report,
+            "prefix": report[:start],
+            "suffix": report[start + len(raw):],
+            "error": False,
+        }
+    
+    async def generate_market_reports(
+        self, market_data: Dict[str, List[Dict[str, str]]], user_id: str = "anonymous"
+    ) -> Dict[str, str]:
+        """
+        Generate reports for several sectors, packing them into shared prompts.
+        
+        Sectors are grouped GEMINI_MULTI_SECTOR_MAX at a time; each group is
+        one Gemini call (one admission slot) whose prompt carries every
+        sector's context in delimited sections and the report instructions
+        once. The output is split back per sector and each part goes through
+        _ensure_report_structure. Sectors missing from the output are
+        generated on their own with generate_market_report; if a group's
+        call fails, its sectors get error reports.
+        
+        Args:
+            market_data: Market data and news snippets keyed by sector name
+            user_id: User the Gemini calls are queued under for fair admission
+            
+        Returns:
+            Structured Markdown report for every sector, keyed like market_data
+            
+        Raises:
+            AdmissionTimeoutError: If no Gemini slot frees up in time
+        """
+        sectors = list(market_data)
+        groups = [sectors[i:i + MULTI_SECTOR_MAX] for i in range(0, len(sectors), MULTI_SECTOR_MAX)]
+        reports: Dict[str, str] = {}
+        for group_reports in await asyncio.gather(*(
+            self._generate_sector_group({sector: market_data[sector] for sector in group}, user_id)
+            for group in groups
+        )):
+            reports.update(group_reports)
+        return reports
+    
+    async def _generate_sector_group(
+        self, market_data: Dict[str, List[Dict[str, str]]], user_id: str
+    ) -> Dict[str, str]:
+        """
+        Generate reports for one group of sectors with a single Gemini call.
+        
+        Args:
+            market_data: Market data and news snippets keyed by sector name
+            user_id: User the Gemini call is queued under for fair admission
+            
+        Returns:
+            Structured Markdown report for every sector in the group
+        """
+        sectors = list(market_data)
+        if len(sectors) == 1:
+            return {sectors[0]: await self.generate_market_report(sectors[0], market_data[sectors[0]], user_id)}
+        
+        try:
+            contexts = {sector: self._build_context(sector, data) for sector, data in market_data.items()}
+            prompt = self._create_multi_sector_prompt(contexts)
+            
+            logger.info("Generating market reports for sectors: %s", ", ".join(sectors), extra=SAMPLED)
+            
+            queued_at = time.perf_counter()
+            async with self.admission.slot(user_id):
+                record_stage("admission", time.perf_counter() - queued_at, "queue")
+                with timed_stage("generation", "llm"):
+                    response = await self._generate_content(prompt)
+            
+            with timed_stage("postprocess", "postprocess"):
+                text = response.text if hasattr(response, "text") else str(response)
+                sections = self._split_sector_reports(text)
+                reports = {
+                    sector: self._ensure_report_structure(sections[sector.lower()], sector)
+                    for sector in sectors
+                    if sections.get(sector.lower())
+                }
+        except AdmissionTimeoutError:
+            raise
+        except Exception as e:
+            error_msg = str(e)
+            error_type = type(e).__name__
+            gemini_errors.inc(error_type=error_type)
+            logger.error("Failed to generate reports for sectors %s: %s: %s", ", ".join(sectors), error_type, error_msg)
+            return {sector: self._generate_error_report(sector, f"{error_type}: {error_msg}") for sector in sectors}
+        
+        missing = [sector for sector in sectors if sector not in reports]
+        if missing:
+            logger.warning("Multi-sector output lacked sectors %s; generating them individually", ", ".join(missing))
+            for sector, report in zip(missing, await asyncio.gather(*(
+                self.generate_market_report(sector, market_data[sector], user_id) for sector in missing
+            ))):
+                reports[sector] = report
+        
+        logger.info("Market reports generated successfully for sectors: %s", ", ".join(sectors), extra=SAMPLED)
+        return reports
+    
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics for the dedicated Gemini executor.
+        
+        Returns:
+            Dictionary with generation mode, queue depth and active workers
+        """
+        stats: Dict[str, Any] = {"mode": "native_async" if self.use_async else "executor"}
+        stats.update(self.executor.get_stats())
+        return stats
+    
+    async def _generate_content(self, prompt: str) -> Any:
+        """
+        Call Gemini generate_content without blocking the event loop.
+        
+        Args:
+            prompt: Prompt text
+            
+        Returns:
+            Gemini response
+        """
+        if self.use_async:
+            return await self.model.generate_content_async(prompt)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.model.generate_content, prompt)
+    
+    async def _stream_content(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream Gemini output text chunks without blocking the event loop.
+        
+        Args:
+            prompt: Prompt text
+            
+        Yields:
+            Non-empty text chunks
+        """
+        if self.use_async:
+            response = await self.model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                text = getattr(chunk, "text", "")
+                if text:
+                    yield text
+            return
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        sentinel = object()
+        
+        def produce() -> None:
+            # Iterating a streamed response blocks, so it runs in a worker thread
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if stop.is_set():
+                        break
+                    text = getattr(chunk, "text", "")
+                    if text:
+                        loop.call_soon_threadsafe(queue.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, sentinel)
+        
+        producer = loop.run_in_executor(self.executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is sentinel:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            if producer.done():
+                await producer
+    
+    @staticmethod
+    def is_error_report(report: str) -> bool:
+        """
+        Check whether a report is a fallback error report.
+        
+        Args:
+            report: Generated report
+            
+        Returns:
+            True if the report was produced by _generate_error_report
+        """
+        return ERROR_REPORT_MARKER in report
+    
     def _build_context(self, sector: str, market_data: List[Dict[str, str]]) -> str:
         """
         Build context string from market data.
@@ -227,6 +588,93 @@ Generate the report now:"""
         
         return prompt
     
+    def _create_multi_sector_prompt(self, contexts: Dict[str, str]) -> str:
+        """
+        Create one prompt asking Gemini for a report per sector.
+        
+        Args:
+            contexts: Market data context keyed by sector name
+            
+        Returns:
+            Formatted prompt string
+        """
+        sectors = list(contexts)
+        data = "\n\n".join(
+            f"{SECTOR_BEGIN.format(sector=sector)}\n{context}\n{SECTOR_END.format(sector=sector)}"
+            for sector, context in contexts.items()
+        )
+        prompt = f"""You are a financial analyst specializing in the Indian market. Analyze the following market data and generate a separate, comprehensive trade opportunities report for each of these sectors in India: {", ".join(sectors)}.
+
+The market data for each sector is enclosed in its own BEGIN/END SECTOR markers:
+
+{data}
+
+For EACH sector, generate a detailed Markdown report with the following EXACT section structure (use ## for main sections):
+
+# <Sector> Sector - Trade Opportunities Analysis
+
+## Sector Overview
+[Provide a brief overview of the sector in India, including key players, market size, and current state]
+
+## Current Market Trends in India
+[Analyze current trends, growth patterns, and market dynamics specific to India]
+
+## Recent News & Signals
+[Summarize and analyze the recent news and market signals from that sector's data only]
+
+## Trade Opportunities
+[Identify specific trade opportunities, investment prospects, and actionable insights]
+
+## Risks & Challenges
+[Outline potential risks, challenges, and factors that could impact the sector]
+
+## Short-term Outlook
+[Provide a short-term (3-6 months) outlook for the sector]
+
+## Disclaimer
+[Include a standard disclaimer about investment risks and that this is for informational purposes only]
+
+Important:
+- Focus specifically on the Indian market
+- Be data-driven and objective
+- Use clear, professional language
+- Ensure all sections are present and well-structured in every report
+- Base each report only on its own sector's market data
+- Wrap each report in the same markers as its data, exactly as written above: a line "{SECTOR_BEGIN.format(sector="<sector>")}" before it and a line "{SECTOR_END.format(sector="<sector>")}" after it, using the sector name as given
+- Output nothing outside the markers
+
+Generate the reports now, in the order listed:"""
+        
+        return prompt
+    
+    @staticmethod
+    def _split_sector_reports(text: str) -> Dict[str, str]:
+        """
+        Split multi-sector output into per-sector reports.
+        
+        A report runs from its BEGIN marker to its END marker, or to the next
+        BEGIN marker (or the end of output) if the END marker is missing.
+        
+        Args:
+            text: Gemini output for a multi-sector prompt
+            
+        Returns:
+            Report text keyed by lower-cased sector name
+        """
+        sections: Dict[str, str] = {}
+        current: Optional[str] = None
+        start = 0
+        for match in _SECTOR_DELIMITER.finditer(text):
+            kind, sector = match.group(1), match.group(2).strip().lower()
+            if current is not None:
+                sections.setdefault(current, text[start:match.start()].strip())
+                current = None
+            if kind == "BEGIN":
+                current, start = sector, match.end()
+        if current is not None:
+            sections.setdefault(current, text[start:].strip())
+        return sections
+    
     def _ensure_report_structure(self, report: str, sector: str) -> str:
         """
         Ensure the report has the required structure.
@@ -264,6 +712,7 @@ This analysis is for informational purposes only and does not constitute financi
         Returns:
             Structured error report
         """
+        error_reports.inc()
         return f"""# {sector.title()} Sector - Trade Opportunities Analysis
 
 ## Sector Overview
@@ -294,7 +743,7 @@ Unable to provide outlook at this time.
 
 This analysis could not be completed due to technical issues: {error_message}
 
-**Note**: This is an error report. Please retry your request or contact support if the issue persists.
+{ERROR_REPORT_MARKER} Please retry your request or contact support if the issue persists.
 
 ---
 
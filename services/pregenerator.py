@@ -0,0 +1,199 @@
+"""Scheduled background pre-generation of sector reports."""
+
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.admission import AdmissionTimeoutError
+from services.ai_service import AIService, PROMPT_VERSION
+from services.report_cache import ReportCache
+from services.report_store import ReportStore
+from services.search_service import SearchService
+from utils.logger import setup_logger
+from utils.metrics import pregenerated_reports
+
+logger = setup_logger()
+
+
+class ReportPregenerator:
+    """
+    Regenerate reports for a list of sectors on a fixed interval.
+
+    Sectors are split into groups of ``group_size``; each group is searched
+    and then generated with one multi-sector Gemini prompt. Every cycle
+    spreads the groups evenly across ``interval`` seconds, each at a random
+    point within its share of the interval, so refreshes never arrive in
+    one burst. At most ``max_concurrency`` groups run at once, and Gemini
+    calls are queued as one admission user so live requests keep their
+    fair share of slots. The first cycle after start runs without spreading
+    to warm the cache as soon as possible.
+
+    Fresh reports replace the report cache entries and are saved to the
+    report store if one is given; error reports are dropped so a failed
+    refresh leaves the previous entry in place.
+    """
+
+    def __init__(
+        self,
+        search_service: SearchService,
+        get_ai_service: Callable[[], Awaitable[Optional[AIService]]],
+        cache: ReportCache,
+        sectors: List[str],
+        interval: float = 600.0,
+        max_concurrency: int = 2,
+        group_size: int = 4,
+        user_id: str = "pregenerator",
+        store: Optional[ReportStore] = None,
+    ):
+        """
+        Initialize pre-generator.
+
+        Args:
+            search_service: Search service used to fetch market data
+            get_ai_service: Coroutine function returning the AI service,
+                or None if it is not available
+            cache: Report cache to populate
+            sectors: Normalized sector names to keep warm
+            interval: Seconds between refreshes of the same sector; should
+                be below the cache TTL so entries never expire
+            max_concurrency: Maximum groups refreshed at the same time
+            group_size: Sectors packed into one Gemini prompt
+            user_id: Admission user the Gemini calls are queued under
+            store: Report store that refreshed reports are saved to
+        """
+        self.search_service = search_service
+        self.get_ai_service = get_ai_service
+        self.cache = cache
+        self.sectors = list(dict.fromkeys(sectors))
+        self.interval = interval
+        self.max_concurrency = max(1, max_concurrency)
+        self.group_size = max(1, group_size)
+        self.user_id = user_id
+        self.store = store
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_cycle_seconds: Optional[float] = None
+
+    def start(self) -> None:
+        """Start the background refresh loop."""
+        if self._task is not None or not self.sectors:
+            return
+        if self.interval >= self.cache.ttl_seconds:
+            logger.warning(
+                "Pre-generation interval (%ss) is not below the report cache TTL (%ss); "
+                "entries may expire between refreshes",
+                self.interval, self.cache.ttl_seconds,
+            )
+
+        async def run() -> None:
+            spread = False
+            while True:
+                started_at = time.monotonic()
+                try:
+                    await self.run_cycle(spread=spread)
+                except Exception as e:
+                    logger.warning("Report pre-generation cycle failed: %s", e)
+                spread = True
+                await asyncio.sleep(max(0.0, started_at + self.interval - time.monotonic()))
+
+        self._task = asyncio.create_task(run())
+        logger.info(
+            "Report pre-generation started: %d sectors every %ss, max_concurrency=%d, group_size=%d",
+            len(self.sectors), self.interval, self.max_concurrency, self.group_size,
+        )
+
+    async def close(self) -> None:
+        """Stop the background refresh loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_cycle(self, spread: bool = True) -> None:
+        """
+        Refresh every sector once.
+
+        Args:
+            spread: Spread groups across the interval with jitter; if False,
+                start every group right away (still capped by max_concurrency)
+        """
+        ai_service = await self.get_ai_service()
+        if ai_service is None:
+            logger.warning("Skipping report pre-generation: AI service not available")
+            return
+
+        started_at = time.monotonic()
+        groups = [self.sectors[i:i + self.group_size] for i in range(0, len(self.sectors), self.group_size)]
+        share = self.interval / len(groups)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def refresh(index: int, group: List[str]) -> None:
+            if spread:
+                await asyncio.sleep((index + random.random()) * share)
+            async with semaphore:
+                await self._refresh_group(group, ai_service)
+
+        await asyncio.gather(*(refresh(index, group) for index, group in enumerate(groups)))
+        self.cycles += 1
+        self.last_cycle_seconds = time.monotonic() - started_at
+        logger.debug("Report pre-generation cycle finished in %.1fs", self.last_cycle_seconds)
+
+    async def _refresh_group(self, sectors: List[str], ai_service: AIService) -> None:
+        """Search and generate one group of sectors and cache the reports."""
+        try:
+            results = await asyncio.gather(*(
+                self.search_service.search_market_data(sector, max_results=10) for sector in sectors
+            ))
+            reports = await ai_service.generate_market_reports(dict(zip(sectors, results)), self.user_id)
+        except AdmissionTimeoutError:
+            logger.warning("Gemini capacity exhausted; skipping pre-generation of %s", ", ".join(sectors))
+            self._record_failures(len(sectors))
+            return
+        except Exception as e:
+            logger.warning("Pre-generation failed for %s: %s", ", ".join(sectors), e)
+            self._record_failures(len(sectors))
+            return
+
+        for sector, report in reports.items():
+            if ai_service.is_error_report(report):
+                self._record_failures(1)
+                continue
+            self.cache.set(self.cache.make_key(sector, ai_service.model_name_used, PROMPT_VERSION), report)
+            if self.store is not None:
+                self.store.save(
+                    sector, report, ai_service.model_name_used, PROMPT_VERSION,
+                    self.search_service.get_fingerprint(sector),
+                )
+            self.refreshed += 1
+            pregenerated_reports.inc(result="ok")
+
+    def _record_failures(self, count: int) -> None:
+        """Count sectors whose refresh did not produce a report."""
+        self.failed += count
+        pregenerated_reports.inc(count, result="error")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pre-generation statistics.
+
+        Returns:
+            Dictionary with schedule settings and refresh counters
+        """
+        return {
+            "running": self._task is not None,
+            "sectors": len(self.sectors),
+            "interval_seconds": self.interval,
+            "max_concurrency": self.max_concurrency,
+            "group_size": self.group_size,
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_cycle_seconds": self.last_cycle_seconds,
+        }
@@ -0,0 +1,185 @@
+"""In-process report cache with TTL, stale-while-revalidate window and LRU eviction."""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class CachedReport(NamedTuple):
+    """Report found in the cache, with its age and freshness."""
+    report: str
+    age: float
+    stale: bool
+
+
+class ReportCache:
+    """
+    Bounded cache for generated Markdown reports.
+
+    Entries are keyed on (sector, model name, prompt version) and are fresh
+    for ``ttl_seconds`` (the soft TTL). For ``max_stale_seconds`` after that
+    they are stale: lookup() still returns them, flagged, so callers can
+    serve them while refreshing. Entries past the hard TTL (soft TTL plus
+    stale window) are dropped. Entries are evicted least-recently-used
+    first once the total size of cached reports exceeds ``max_bytes``.
+    """
+
+    def __init__(self, ttl_seconds: int = 900, max_bytes: int = 8 * 1024 * 1024, max_stale_seconds: int = 0):
+        """
+        Initialize report cache.
+
+        Args:
+            ttl_seconds: Seconds each cached report is fresh (soft TTL)
+            max_bytes: Maximum total size of cached reports in bytes
+            max_stale_seconds: Seconds past the soft TTL a stale report may
+                still be served (0 disables stale serving)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_stale_seconds = max_stale_seconds
+        # {key: (report, size_bytes, stored_at)}
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[str, int, float]]" = OrderedDict()
+        self._size_bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        logger.info(
+            "Report cache initialized: ttl=%ss, max_stale=%ss, max_bytes=%s",
+            ttl_seconds, max_stale_seconds, max_bytes,
+        )
+
+    @staticmethod
+    def make_key(sector: str, model_name: str, prompt_version: str) -> Tuple[str, str, str]:
+        """
+        Build a cache key for a report.
+
+        Args:
+            sector: Normalized sector name
+            model_name: Gemini model used to generate the report
+            prompt_version: Version of the prompt template
+
+        Returns:
+            Cache key tuple
+        """
+        return (sector, model_name, prompt_version)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[str]:
+        """
+        Look up a fresh cached report.
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Cached report or None if missing or past its soft TTL
+        """
+        cached = self.lookup(key, allow_stale=False)
+        return cached.report if cached is not None else None
+
+    def lookup(self, key: Tuple[str, str, str], allow_stale: bool = True) -> Optional[CachedReport]:
+        """
+        Look up a cached report, including stale ones.
+
+        Args:
+            key: Cache key from make_key()
+            allow_stale: Return reports past the soft TTL but within the
+                hard TTL (flagged stale) instead of treating them as misses
+
+        Returns:
+            CachedReport or None if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        report, size, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age >= self.ttl_seconds + self.max_stale_seconds:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        stale = age >= self.ttl_seconds
+        if stale and not allow_stale:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return CachedReport(report, age, stale)
+
+    def set(self, key: Tuple[str, str, str], report: str, age: float = 0.0) -> None:
+        """
+        Store a report in the cache.
+
+        Args:
+            key: Cache key from make_key()
+            report: Markdown report to cache
+            age: Seconds since the report was generated (for reports loaded
+                from storage); reports past the hard TTL are not cached
+        """
+        if age >= self.ttl_seconds + self.max_stale_seconds:
+            return
+
+        size = len(report.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.debug("Report for %s too large to cache (%s bytes)", key[0], size)
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (report, size, time.monotonic() - age)
+        self._size_bytes += size
+
+        while self._size_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached reports."""
+        self._entries.clear()
+        self._size_bytes = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and current size
+        """
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size_bytes": self._size_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "max_stale_seconds": self.max_stale_seconds,
+        }
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        """Remove an entry and update the size accounting."""
+        _, size, _ = self._entries.pop(key)
+        self._size_bytes -= size
+
+
+# Global report cache instance
+report_cache = ReportCache(
+    ttl_seconds=int(os.getenv("REPORT_CACHE_TTL_SECONDS", "900")),
+    max_bytes=int(os.getenv("REPORT_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+    max_stale_seconds=int(os.getenv("REPORT_CACHE_MAX_STALE_SECONDS", "900")),
+)
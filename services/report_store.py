@@ -0,0 +1,385 @@
+"""Persistent report history on SQLite."""
+
+import os
+import time
+import zlib
+import asyncio
+import sqlite3
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+_COLUMNS = "id, sector, generated_at, model_name, prompt_version, search_fingerprint"
+
+# Queued after the last report to stop the writer once it has written everything
+_STOP = object()
+
+
+class StoredReport(NamedTuple):
+    """One generated report as stored on disk."""
+    id: int
+    sector: str
+    generated_at: float
+    model_name: str
+    prompt_version: str
+    search_fingerprint: Optional[str]
+    report: Optional[str]
+
+    @property
+    def age(self) -> float:
+        """Seconds since the report was generated."""
+        return max(0.0, time.time() - self.generated_at)
+
+
+class ReportStore:
+    """
+    History of generated reports in a SQLite database.
+
+    Each row holds the sector, wall-clock generation time, model name,
+    prompt version, fingerprint of the search results the report was built
+    from and the zlib-compressed Markdown body. An index on
+    (sector, generated_at) keeps latest-report and history queries to an
+    index range scan. The database runs in WAL mode, so readers in every
+    worker proceed while one worker writes.
+
+    save() only queues the report. A background writer inserts queued
+    reports in batches of up to ``batch_size`` rows per transaction,
+    waiting at most ``flush_interval`` seconds to fill a batch. Reports
+    saved while the writer is not running, or while ``max_queued`` reports
+    are already waiting, are dropped and counted. Reads run in a worker
+    thread so the event loop is not blocked on disk I/O. close() lets the
+    writer finish its current batch and everything still queued before the
+    database is closed.
+
+    The table is bounded: in the same transaction as each batch, the writer
+    deletes reports older than ``max_age_seconds`` and all but the newest
+    ``max_per_sector`` reports of each sector in the batch.
+    """
+
+    def __init__(
+        self,
+        path: str = "reports.sqlite3",
+        batch_size: int = 32,
+        flush_interval: float = 1.0,
+        compression_level: int = 6,
+        max_queued: int = 1000,
+        max_per_sector: int = 100,
+        max_age_seconds: float = 30 * 86400,
+    ):
+        """
+        Initialize report store and create the schema.
+
+        Args:
+            path: Database file path shared by all workers
+            batch_size: Maximum reports inserted per transaction
+            flush_interval: Maximum seconds a queued report waits for a batch
+            compression_level: zlib level used for report bodies (1-9)
+            max_queued: Maximum reports waiting for the writer
+            max_per_sector: Reports kept per sector (0 for no limit)
+            max_age_seconds: Reports older than this are deleted (0 for no limit)
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.compression_level = compression_level
+        self.max_queued = max(1, max_queued)
+        self.max_per_sector = max_per_sector
+        self.max_age_seconds = max_age_seconds
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "id INTEGER PRIMARY KEY, "
+            "sector TEXT NOT NULL, "
+            "generated_at REAL NOT NULL, "
+            "model_name TEXT NOT NULL, "
+            "prompt_version TEXT NOT NULL, "
+            "search_fingerprint TEXT, "
+            "body BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reports_sector_generated_at ON reports (sector, generated_at)"
+        )
+        # latest_per_sector() filters on model and prompt version
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reports_model_prompt_sector "
+            "ON reports (model_name, prompt_version, sector, generated_at)"
+        )
+        # Retention deletes by age across all sectors
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_generated_at ON reports (generated_at)")
+        # One connection shared across threads; serialize access to it
+        self._conn_lock = threading.Lock()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.dropped = 0
+        self.pruned = 0
+
+    def save(
+        self,
+        sector: str,
+        report: str,
+        model_name: str,
+        prompt_version: str,
+        search_fingerprint: Optional[str] = None,
+    ) -> None:
+        """
+        Queue a generated report for writing.
+
+        Args:
+            sector: Normalized sector name
+            report: Markdown report
+            model_name: Gemini model that generated the report
+            prompt_version: Version of the prompt template
+            search_fingerprint: Fingerprint of the search results used
+        """
+        if self._writer_task is None or self._queue.qsize() >= self.max_queued:
+            self.dropped += 1
+            # Log only every 100th drop so a stalled writer does not flood the logs
+            if self.dropped % 100 == 1:
+                logger.warning(
+                    "Report store is not running or its queue is full; dropped report for %s (%d dropped so far)",
+                    sector, self.dropped,
+                )
+            return
+        body = zlib.compress(report.encode("utf-8"), self.compression_level)
+        self._queue.put_nowait((sector, time.time(), model_name, prompt_version, search_fingerprint, body))
+
+    def start(self) -> None:
+        """Start the background writer."""
+        if self._writer_task is not None:
+            return
+
+        async def run() -> None:
+            while True:
+                item = await self._queue.get()
+                if item is _STOP:
+                    return
+                batch = [item]
+                stopping = False
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                await self._write(batch)
+                if stopping:
+                    return
+
+        self._writer_task = asyncio.create_task(run())
+
+    async def flush(self) -> None:
+        """Write every queued report now."""
+        batch = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is _STOP:
+                continue
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                await self._write(batch)
+                batch = []
+        if batch:
+            await self._write(batch)
+
+    async def close(self) -> None:
+        """Stop the writer, write queued reports and close the database."""
+        if self._writer_task is not None:
+            # The writer drains the queue ahead of the stop marker, including
+            # the batch it is currently filling
+            self._queue.put_nowait(_STOP)
+            await self._writer_task
+            self._writer_task = None
+        await self.flush()
+        with self._conn_lock:
+            self._conn.close()
+
+    async def latest(
+        self, sector: str, model_name: Optional[str] = None, prompt_version: Optional[str] = None
+    ) -> Optional[StoredReport]:
+        """
+        Get the most recent report for a sector.
+
+        Args:
+            sector: Normalized sector name
+            model_name: Only consider reports from this model
+            prompt_version: Only consider reports from this prompt version
+
+        Returns:
+            Latest matching report, or None if there is none
+        """
+        return await asyncio.to_thread(self._latest_sync, sector, model_name, prompt_version)
+
+    async def latest_per_sector(self, model_name: str, prompt_version: str) -> List[StoredReport]:
+        """
+        Get the most recent report of every sector for a model and prompt version.
+
+        Args:
+            model_name: Gemini model name
+            prompt_version: Version of the prompt template
+
+        Returns:
+            One report per sector
+        """
+        return await asyncio.to_thread(self._latest_per_sector_sync, model_name, prompt_version)
+
+    async def history(
+        self, sector: str, limit: int = 20, before: Optional[float] = None, include_body: bool = False
+    ) -> List[StoredReport]:
+        """
+        Get a sector's reports, newest first.
+
+        Args:
+            sector: Normalized sector name
+            limit: Maximum reports returned
+            before: Only return reports generated before this Unix time
+                (for paging)
+            include_body: Decompress and return report bodies; otherwise
+                ``report`` is None and bodies are not read
+
+        Returns:
+            Reports ordered by generation time, newest first
+        """
+        return await asyncio.to_thread(self._history_sync, sector, limit, before, include_body)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get report store statistics.
+
+        Returns:
+            Dictionary with write counters and queue depth
+        """
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "dropped": self.dropped,
+            "pruned": self.pruned,
+        }
+
+    async def _write(self, batch: List[Tuple[str, float, str, str, Optional[str], bytes]]) -> None:
+        """Insert a batch of queued reports in one transaction."""
+        try:
+            await asyncio.to_thread(self._write_sync, batch)
+        except Exception as e:
+            self.write_errors += 1
+            logger.error("Failed to write %d reports to %s: %s", len(batch), self.path, e)
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def _write_sync(self, batch: List[Tuple[str, float, str, str, Optional[str], bytes]]) -> None:
+        with self._conn_lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                cur.executemany(
+                    "INSERT INTO reports "
+                    "(sector, generated_at, model_name, prompt_version, search_fingerprint, body) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+                pruned = self._prune(cur, {row[0] for row in batch})
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        self.pruned += pruned
+
+    def _prune(self, cur: sqlite3.Cursor, sectors: Set[str]) -> int:
+        """Apply the retention limits; runs inside the batch's transaction."""
+        pruned = 0
+        if self.max_age_seconds > 0:
+            pruned += cur.execute(
+                "DELETE FROM reports WHERE generated_at < ?", (time.time() - self.max_age_seconds,)
+            ).rowcount
+        if self.max_per_sector > 0:
+            for sector in sectors:
+                pruned += cur.execute(
+                    "DELETE FROM reports WHERE sector = ? AND id NOT IN "
+                    "(SELECT id FROM reports WHERE sector = ? ORDER BY generated_at DESC LIMIT ?)",
+                    (sector, sector, self.max_per_sector),
+                ).rowcount
+        return pruned
+
+    def _latest_sync(
+        self, sector: str, model_name: Optional[str], prompt_version: Optional[str]
+    ) -> Optional[StoredReport]:
+        query = f"SELECT {_COLUMNS}, body FROM reports WHERE sector = ?"
+        params: List[Any] = [sector]
+        if model_name is not None:
+            query += " AND model_name = ?"
+            params.append(model_name)
+        if prompt_version is not None:
+            query += " AND prompt_version = ?"
+            params.append(prompt_version)
+        query += " ORDER BY generated_at DESC LIMIT 1"
+        with self._conn_lock:
+            row = self._conn.execute(query, params).fetchone()
+        return self._to_report(row) if row else None
+
+    def _latest_per_sector_sync(self, model_name: str, prompt_version: str) -> List[StoredReport]:
+        # SQLite returns the bare columns of the row holding MAX(generated_at)
+        with self._conn_lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS}, body, MAX(generated_at) FROM reports "
+                "WHERE model_name = ? AND prompt_version = ? GROUP BY sector",
+                (model_name, prompt_version),
+            ).fetchall()
+        return [self._to_report(row[:-1]) for row in rows]
+
+    def _history_sync(
+        self, sector: str, limit: int, before: Optional[float], include_body: bool
+    ) -> List[StoredReport]:
+        columns = f"{_COLUMNS}, body" if include_body else f"{_COLUMNS}, NULL"
+        with self._conn_lock:
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM reports WHERE sector = ? AND generated_at < ? "
+                "ORDER BY generated_at DESC LIMIT ?",
+                (sector, before if before is not None else float("inf"), limit),
+            ).fetchall()
+        return [self._to_report(row) for row in rows]
+
+    @staticmethod
+    def _to_report(row: tuple) -> StoredReport:
+        *metadata, body = row
+        report = zlib.decompress(body).decode("utf-8") if body is not None else None
+        return StoredReport(*metadata, report)
+
+
+def create_report_store_from_env() -> Optional[ReportStore]:
+    """
+    Build the report store from environment variables.
+
+    Opens (and if needed creates) the database, so call it at startup
+    rather than at import.
+
+    Returns:
+        Configured report store, or None if REPORT_STORE_ENABLED is false
+    """
+    if os.getenv("REPORT_STORE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    return ReportStore(
+        path=os.getenv("REPORT_STORE_PATH", "reports.sqlite3"),
+        batch_size=int(os.getenv("REPORT_STORE_BATCH_SIZE", "32")),
+        flush_interval=float(os.getenv("REPORT_STORE_FLUSH_INTERVAL_SECONDS", "1")),
+        max_queued=int(os.getenv("REPORT_STORE_MAX_QUEUED", "1000")),
+        max_per_sector=int(os.getenv("REPORT_STORE_MAX_PER_SECTOR", "100")),
+        max_age_seconds=float(os.getenv("REPORT_STORE_RETENTION_SECONDS", str(30 * 86400))),
+    )
@@ -1,26 +1,119 @@
 """Web search service for fetching market data and news."""
 
+import os
+import time
+import hashlib
+import importlib.util
 import httpx
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
 
-from utils.logger import setup_logger
+from utils.logger import SAMPLED, setup_logger
+from utils.metrics import cache_lookups, search_fallbacks
+from utils.timing import record_stage
 
 logger = setup_logger()
 
+# Result sources, used to pick a cache TTL
+SOURCE_DUCKDUCKGO = "duckduckgo"
+SOURCE_MOCK = "mock"
+
+
+class _SearchCacheEntry(NamedTuple):
+    """Cached search results stored as compact (title, snippet, url) tuples."""
+    records: Tuple[Tuple[str, str, str], ...]
+    fingerprint: str
+    source: str
+    max_results: int
+    expires_at: float
+
 
 class SearchService:
     """Service for searching web content using DuckDuckGo or similar APIs."""
     
-    def __init__(self, timeout: int = 30):
+    def __init__(
+        self,
+        timeout: int = 30,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        search_url: Optional[str] = None,
+    ):
         """
         Initialize search service.
         
         Args:
             timeout: Request timeout in seconds
+            max_connections: Connection pool size (if None, reads from env)
+            max_keepalive_connections: Idle connections kept open (if None, reads from env)
+            keepalive_expiry: Seconds an idle connection is kept (if None, reads from env)
+            http2: Enable HTTP/2 (if None, reads from env; requires the h2 package)
+            search_url: DuckDuckGo HTML endpoint (if None, reads SEARCH_URL from env)
         """
         self.timeout = timeout
         self.base_url = "https://api.duckduckgo.com"
+        self.search_url = search_url or os.getenv("SEARCH_URL", "https://html.duckduckgo.com/html/")
+        # Compare with None so an explicit 0 (no idle connections kept) is honored
+        if max_connections is None:
+            max_connections = int(os.getenv("SEARCH_MAX_CONNECTIONS", "20"))
+        if max_keepalive_connections is None:
+            max_keepalive_connections = int(os.getenv("SEARCH_MAX_KEEPALIVE_CONNECTIONS", "10"))
+        if keepalive_expiry is None:
+            keepalive_expiry = float(os.getenv("SEARCH_KEEPALIVE_EXPIRY", "30"))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 is None:
+            http2 = os.getenv("SEARCH_HTTP2", "false").lower() in ("1", "true", "yes")
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("SEARCH_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Search result cache: {query: _SearchCacheEntry}
+        self.source_ttls: Dict[str, float] = {
+            SOURCE_DUCKDUCKGO: float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "600")),
+            SOURCE_MOCK: float(os.getenv("SEARCH_CACHE_MOCK_TTL_SECONDS", "60")),
+        }
+        self.cache_max_entries = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+        self._cache: Dict[str, _SearchCacheEntry] = {}
+        # Fingerprint history per query: {query: (previous, current)}
+        self._fingerprints: Dict[str, Tuple[Optional[str], str]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    async def start(self) -> None:
+        """Open the shared HTTP client (called from the app startup event)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                },
+            )
+            logger.info(
+                "Search HTTP client opened (max_connections=%s, http2=%s)",
+                self.limits.max_connections, self.http2,
+            )
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client (called from the app shutdown event)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Search HTTP client closed")
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, opening it if startup did not."""
+        if self._client is None:
+            await self.start()
+        return self._client
     
     async def search_market_data(
         self, sector: str, max_results: int = 10
@@ -35,6 +128,7 @@ class SearchService:
         Returns:
             List of search results with title, snippet, and url
         """
+        started_at = time.perf_counter()
         try:
             # DuckDuckGo Instant Answer API (limited but free)
             # For production, consider using DuckDuckGo HTML scraping or other APIs
@@ -42,8 +136,14 @@ class SearchService:
             # Note: DuckDuckGo API is limited. For better results, we'll use a mock
             # or implement HTML scraping. Here we use a simplified approach.
             
-            query = f"Indian {sector} market news 2024"
-            logger.info(f"Searching for: {query}")
+            query = self._build_query(sector)
+            
+            cached = self._get_cached(query, max_results)
+            if cached is not None:
+                logger.info("Serving cached search results for: %s", query, extra=SAMPLED)
+                return cached
+            
+            logger.info("Searching for: %s", query, extra=SAMPLED)
             
             # Using DuckDuckGo HTML interface (simplified)
             # In production, you might want to use:
@@ -54,19 +154,124 @@ class SearchService:
             
             # For now, return mock data structure
             # Replace this with actual API calls in production
-            results = await self._search_duckduckgo(query, max_results)
+            results, source = await self._search_duckduckgo(query, max_results)
+            self._store(query, results, source, max_results)
             
-            logger.info(f"Found {len(results)} search results for sector: {sector}")
+            logger.info("Found %s search results for sector: %s", len(results), sector, extra=SAMPLED)
             return results
             
         except Exception as e:
-            logger.error(f"Search failed for sector {sector}: {str(e)}")
+            logger.error("Search failed for sector %s: %s", sector, e)
             # Return empty results on error
             return []
+        finally:
+            record_stage("search", time.perf_counter() - started_at, "search")
+    
+    def get_fingerprint(self, sector: str) -> Optional[str]:
+        """
+        Get the content hash of the most recent results for a sector.
+        
+        Args:
+            sector: Sector name
+            
+        Returns:
+            Hex digest of the last fetched result set, or None if never fetched
+        """
+        history = self._fingerprints.get(self._build_query(sector))
+        return history[1] if history else None
+    
+    def results_changed(self, sector: str) -> bool:
+        """
+        Check whether the last fetch for a sector returned different results
+        than the fetch before it.
+        
+        Args:
+            sector: Sector name
+            
+        Returns:
+            True if the results changed (or only one fetch has happened), False otherwise
+        """
+        history = self._fingerprints.get(self._build_query(sector))
+        if history is None:
+            return True
+        previous, current = history
+        return previous != current
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Get search cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counters and entry count
+        """
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "entries": len(self._cache),
+        }
+    
+    def _build_query(self, sector: str) -> str:
+        """Build the search query for a sector."""
+        return f"Indian {sector} market news 2024"
+    
+    def _get_cached(self, query: str, max_results: int) -> Optional[List[Dict[str, str]]]:
+        """Return cached results for a query if fresh and large enough."""
+        entry = self._cache.get(query)
+        if (
+            entry is None
+            or entry.expires_at <= time.monotonic()
+            or entry.max_results < max_results
+        ):
+            self.cache_misses += 1
+            cache_lookups.inc(cache="search", result="miss")
+            return None
+        
+        self.cache_hits += 1
+        cache_lookups.inc(cache="search", result="hit")
+        return [
+            {"title": title, "snippet": snippet, "url": url}
+            for title, snippet, url in entry.records[:max_results]
+        ]
+    
+    def _store(
+        self, query: str, results: List[Dict[str, str]], source: str, max_results: int
+    ) -> None:
+        """Cache results for a query and record their fingerprint."""
+        records = tuple(
+            (item.get("title", ""), item.get("snippet", ""), item.get("url", ""))
+            for item in results
+        )
+        fingerprint = self._fingerprint(records)
+        
+        history = self._fingerprints.get(query)
+        self._fingerprints[query] = (history[1] if history else None, fingerprint)
+        
+        self._cache.pop(query, None)
+        if len(self._cache) >= self.cache_max_entries:
+            # Drop the oldest inserted entry
+            del self._cache[next(iter(self._cache))]
+        self._cache[query] = _SearchCacheEntry(
+            records=records,
+            fingerprint=fingerprint,
+            source=source,
+            max_results=max_results,
+            expires_at=time.monotonic() + self.source_ttls.get(source, 0),
+        )
+    
+    @staticmethod
+    def _fingerprint(records: Tuple[Tuple[str, str, str], ...]) -> str:
+        """Compute a content hash of a result set."""
+        digest = hashlib.sha256()
+        for record in records:
+            for field in record:
+                digest.update(field.encode("utf-8"))
+                digest.update(b"\x1f")
+            digest.update(b"\x1e")
+        return digest.hexdigest()
     
     async def _search_duckduckgo(
         self, query: str, max_results: int
-    ) -> List[Dict[str, str]]:
+    ) -> Tuple[List[Dict[str, str]], str]:
         """
         Search using DuckDuckGo (mockable implementation).
         
@@ -75,38 +280,33 @@ class SearchService:
             max_results: Maximum results to return
             
         Returns:
-            List of search results
+            Tuple of (search results, source the results came from)
         """
         # Since DuckDuckGo doesn't have a public REST API,
         # we'll use a simple HTTP request to get HTML and parse it
         # For production, consider using a proper search API or scraping library
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # DuckDuckGo search URL
-                url = f"https://html.duckduckgo.com/html/"
-                params = {"q": query}
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-                
-                response = await client.get(url, params=params, headers=headers)
+            client = await self._get_client()
+            params = {"q": query}
+            
+            response = await client.get(self.search_url, params=params)
+            
+            if response.status_code == 200:
+                # Parse HTML to extract results (simplified)
+                # In production, use BeautifulSoup or similar
+                results = self._parse_search_results(response.text, max_results)
+                return results, SOURCE_DUCKDUCKGO
+            else:
+                logger.warning("DuckDuckGo search returned status %s", response.status_code)
+                return self._get_mock_results(query, max_results), SOURCE_MOCK
                 
-                if response.status_code == 200:
-                    # Parse HTML to extract results (simplified)
-                    # In production, use BeautifulSoup or similar
-                    results = self._parse_search_results(response.text, max_results)
-                    return results
-                else:
-                    logger.warning(f"DuckDuckGo search returned status {response.status_code}")
-                    return self._get_mock_results(query, max_results)
-                    
         except httpx.TimeoutException:
             logger.error("Search request timed out")
-            return self._get_mock_results(query, max_results)
+            return self._get_mock_results(query, max_results), SOURCE_MOCK
         except Exception as e:
-            logger.error(f"Search error: {str(e)}")
-            return self._get_mock_results(query, max_results)
+            logger.error("Search error: %s", e)
+            return self._get_mock_results(query, max_results), SOURCE_MOCK
     
     def _parse_search_results(self, html: str, max_results: int) -> List[Dict[str, str]]:
         """
@@ -134,6 +334,8 @@ class SearchService:
         Returns:
             List of mock results
         """
+        search_fallbacks.inc()
+        
         # Mock data that simulates real search results
         mock_results = [
             {
@@ -0,0 +1,75 @@
+"""FairAdmissionController ordering, queue-wait timeout and cancellation."""
+
+import asyncio
+
+import pytest
+
+from services.admission import AdmissionTimeoutError, FairAdmissionController
+
+
+def test_waiting_users_are_granted_slots_round_robin():
+    order = []
+
+    async def generate(admission, user_id, label):
+        async with admission.slot(user_id):
+            order.append(label)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        admission = FairAdmissionController(max_concurrent=1, max_queue_wait=5.0)
+        await admission.acquire("holder")
+        # alice queues three requests before bob queues one
+        tasks = [asyncio.create_task(generate(admission, "alice", f"alice-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(generate(admission, "bob", "bob-0")))
+        await asyncio.sleep(0)
+        admission.release()
+        await asyncio.gather(*tasks)
+        return admission.get_stats()
+
+    stats = asyncio.run(main())
+    assert order == ["alice-0", "bob-0", "alice-1", "alice-2"]
+    assert (stats["active"], stats["queued"], stats["admitted"]) == (0, 0, 5)
+
+
+def test_request_waiting_past_max_queue_wait_is_rejected():
+    async def main():
+        admission = FairAdmissionController(max_concurrent=1, max_queue_wait=0.05)
+        await admission.acquire("alice")
+        with pytest.raises(AdmissionTimeoutError) as excinfo:
+            await admission.acquire("bob")
+        return admission.get_stats(), excinfo.value
+
+    stats, error = asyncio.run(main())
+    # Clients are told to retry after at least a second
+    assert error.retry_after == 1
+    assert (stats["active"], stats["queued"], stats["users_waiting"], stats["rejected"]) == (1, 0, 0, 1)
+
+
+def test_cancelled_waiter_leaves_the_queue_and_does_not_hold_a_slot():
+    async def main():
+        admission = FairAdmissionController(max_concurrent=1, max_queue_wait=5.0)
+        await admission.acquire("alice")
+        waiter = asyncio.create_task(admission.acquire("bob"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        queued = admission.get_stats()["queued"]
+        admission.release()
+        return queued, admission.get_stats()
+
+    queued, stats = asyncio.run(main())
+    assert queued == 0
+    assert (stats["active"], stats["admitted"]) == (0, 1)
+
+
+def test_slots_are_granted_immediately_below_the_cap():
+    async def main():
+        admission = FairAdmissionController(max_concurrent=2, max_queue_wait=0.05)
+        await admission.acquire("alice")
+        await admission.acquire("alice")
+        return admission.get_stats()
+
+    stats = asyncio.run(main())
+    assert (stats["active"], stats["rejected"]) == (2, 0)
@@ -0,0 +1,118 @@
+"""
+The analyze endpoints against a fake Gemini model and fake search results.
+
+The app's startup hook is not run, so no background services start; the
+route module's services are replaced per test instead.
+"""
+
+import json
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.routes as routes
+from benchmarks.fake_gemini import FakeGeminiModel
+from benchmarks.latency import LatencyDistribution
+from main import app
+from security.auth import get_current_user
+from security.rate_limiter import RateLimiter
+from services.admission import FairAdmissionController
+from services.ai_service import AIService
+from services.report_cache import ReportCache
+
+
+class Harness:
+    """Test client plus the fakes the routes were wired to."""
+
+    def __init__(self, monkeypatch):
+        self.searches = []
+        self.admission = FairAdmissionController(max_concurrent=4, max_queue_wait=5.0)
+        self.gemini = FakeGeminiModel(
+            first_chunk_latency=LatencyDistribution.parse("constant:0.01"),
+            chunk_interval=LatencyDistribution.parse("constant:0"),
+            chunks=2,
+            report_bytes=256,
+        )
+        self.rate_limiter = RateLimiter(max_requests=5, window_seconds=60)
+
+        async def search_market_data(sector, max_results=10):
+            self.searches.append(sector)
+            return [{"title": f"{sector} news", "snippet": f"Latest on {sector}", "url": "https://example.com"}]
+
+        monkeypatch.setattr(routes.search_service, "search_market_data", search_market_data)
+        monkeypatch.setattr(routes, "ai_service", AIService(api_key="test", model=self.gemini, admission=self.admission))
+        monkeypatch.setattr(routes, "report_cache", ReportCache(ttl_seconds=60))
+        monkeypatch.setattr(routes, "rate_limiter", self.rate_limiter)
+        app.dependency_overrides[get_current_user] = lambda: {"user_id": "alice"}
+        self.client = TestClient(app)
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    yield Harness(monkeypatch)
+    app.dependency_overrides.clear()
+
+
+def test_analyze_returns_a_report_and_caches_it(harness):
+    first = harness.client.get("/analyze/banking")
+    second = harness.client.get("/analyze/banking")
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.json()["sector"] == "banking"
+    assert (first.headers["X-Report-Cache"], second.headers["X-Report-Cache"]) == ("miss", "fresh")
+    assert harness.searches == ["banking"]
+
+
+def test_analyze_returns_503_when_no_gemini_slot_frees_up(harness):
+    harness.admission.max_concurrent = 1
+    harness.admission.max_queue_wait = 0.05
+    # Another generation holds the only slot
+    asyncio.run(harness.admission.acquire("bob"))
+
+    response = harness.client.get("/analyze/banking")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert harness.admission.get_stats()["rejected"] == 1
+
+
+def test_batch_analyzes_each_distinct_sector_once_and_charges_per_sector(harness):
+    response = harness.client.post("/analyze/batch", json={"sectors": ["Banking", "energy", "banking "]})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["sector"] for item in results] == ["banking", "energy"]
+    assert all(item["status_code"] == 200 and item["report"] for item in results)
+    assert sorted(harness.searches) == ["banking", "energy"]
+    assert harness.client.get("/rate-limit-info").json()["remaining"] == 3
+
+
+def test_batch_larger_than_the_whole_limit_is_rejected_with_400(harness):
+    sectors = ["banking", "energy", "retail", "pharmaceuticals", "technology", "agriculture"]
+    response = harness.client.post("/analyze/batch", json={"sectors": sectors})
+
+    assert response.status_code == 400
+    assert "at most 5 sectors" in response.json()["detail"]
+    assert harness.searches == []
+    # Nothing was charged
+    assert harness.client.get("/rate-limit-info").json()["remaining"] == 5
+
+
+def test_batch_that_does_not_fit_the_remaining_allowance_gets_429_and_costs_nothing(harness):
+    assert harness.client.post("/analyze/batch", json={"sectors": ["banking", "energy", "retail"]}).status_code == 200
+    response = harness.client.post("/analyze/batch", json={"sectors": ["technology", "agriculture", "pharmaceuticals"]})
+
+    assert response.status_code == 429
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+    assert harness.client.get("/rate-limit-info").json()["remaining"] == 2
+
+
+def test_batch_stream_writes_one_ndjson_line_per_sector(harness):
+    with harness.client.stream("POST", "/analyze/batch", json={"sectors": ["banking", "energy"], "stream": True}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert sorted(item["sector"] for item in lines) == ["banking", "energy"]
+    assert all(item["status_code"] == 200 and item["report"] for item in lines)
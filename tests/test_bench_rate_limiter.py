@@ -0,0 +1,24 @@
+"""The rate-limiter benchmark leaves the backends' clock as it found it."""
+
+import time
+import asyncio
+
+import pytest
+
+import security.rate_limit_backends as backends_module
+from benchmarks import bench_rate_limiter
+
+
+@pytest.mark.parametrize("impl", ["deque", "gcra"])
+def test_bench_restores_the_backend_clock(monkeypatch, impl):
+    monkeypatch.setattr(bench_rate_limiter, "CALLS", 10)
+    asyncio.run(bench_rate_limiter.bench(impl, 10, rolling=True))
+    assert backends_module.time is time
+
+
+def test_backend_clock_is_restored_when_the_block_fails():
+    with pytest.raises(RuntimeError):
+        with bench_rate_limiter.backend_clock(bench_rate_limiter.FakeClock(step=1.0)):
+            assert backends_module.time.monotonic() == 1.0
+            raise RuntimeError("benchmark failed")
+    assert backends_module.time is time
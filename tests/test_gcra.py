@@ -0,0 +1,87 @@
+"""GCRA step functions and the in-memory GCRA backend."""
+
+import asyncio
+
+import pytest
+
+from security.rate_limit_backends import InMemoryBackend, gcra_check, gcra_peek
+from security.rate_limiter import GCRA, RateLimiter
+
+INTERVAL = 6.0
+BURST = 3
+
+
+def test_new_user_gets_the_full_burst():
+    allowed, new_tat, remaining, reset_after = gcra_check(100.0, None, INTERVAL, BURST)
+    assert (allowed, new_tat, remaining, reset_after) == (True, 106.0, 2, 6.0)
+
+
+def test_burst_is_allowed_back_to_back_and_the_next_request_waits_one_interval():
+    tat = None
+    for expected_remaining in (2, 1, 0):
+        allowed, tat, remaining, _ = gcra_check(100.0, tat, INTERVAL, BURST)
+        assert allowed and remaining == expected_remaining
+    assert tat == 118.0
+
+    allowed, unchanged_tat, remaining, reset_after = gcra_check(100.0, tat, INTERVAL, BURST)
+    assert (allowed, unchanged_tat, remaining, reset_after) == (False, 118.0, 0, 6.0)
+
+
+def test_request_is_allowed_exactly_when_the_tat_is_one_burst_ahead():
+    # TAT 118 at now 106: one interval has drained, so exactly one request fits
+    assert gcra_check(106.0, 118.0, INTERVAL, BURST)[:3] == (True, 124.0, 0)
+    assert gcra_check(105.999, 118.0, INTERVAL, BURST)[0] is False
+
+
+def test_a_tat_in_the_past_counts_as_an_empty_bucket():
+    assert gcra_check(1000.0, 118.0, INTERVAL, BURST) == gcra_check(1000.0, None, INTERVAL, BURST)
+
+
+def test_cost_is_all_or_nothing():
+    allowed, tat, remaining, _ = gcra_check(100.0, None, INTERVAL, BURST, cost=3)
+    assert (allowed, tat, remaining) == (True, 118.0, 0)
+
+    # Two slots have drained by 112, so a cost of 3 is denied and charges nothing
+    allowed, unchanged_tat, _, reset_after = gcra_check(112.0, tat, INTERVAL, BURST, cost=3)
+    assert (allowed, unchanged_tat, reset_after) == (False, 118.0, 6.0)
+
+
+def test_cost_above_burst_is_never_allowed():
+    # Even an idle user cannot fit it; callers reject such costs up front via max_cost
+    allowed, tat, remaining, reset_after = gcra_check(100.0, None, INTERVAL, BURST, cost=BURST + 1)
+    assert (allowed, tat, remaining) == (False, 100.0, 0)
+    assert reset_after == INTERVAL
+
+
+def test_peek_reports_remaining_without_charging():
+    assert gcra_peek(100.0, None, INTERVAL, BURST) == (3, 0.0)
+    assert gcra_peek(100.0, 112.0, INTERVAL, BURST) == (1, 12.0)
+    assert gcra_peek(200.0, 112.0, INTERVAL, BURST) == (3, 0.0)
+
+
+def test_limiter_max_cost_is_the_burst():
+    limiter = RateLimiter(max_requests=10, window_seconds=60, algorithm=GCRA, burst=BURST)
+    assert limiter.max_cost == BURST
+
+    async def main():
+        return await limiter.is_allowed("alice", cost=BURST + 1), await limiter.is_allowed("alice", cost=BURST)
+
+    oversized, full_burst = asyncio.run(main())
+    assert oversized[0] is False
+    assert full_burst[:2] == (True, 0)
+
+
+@pytest.mark.parametrize("num_stripes", [0, 16])
+def test_in_memory_backend_keeps_one_tat_per_user(num_stripes):
+    backend = InMemoryBackend(num_stripes=num_stripes, max_users=2)
+
+    async def main():
+        results = [(await backend.hit_gcra("alice", INTERVAL, BURST))[0] for _ in range(4)]
+        await backend.hit_gcra("bob", INTERVAL, BURST)
+        await backend.hit_gcra("carol", INTERVAL, BURST)
+        return results
+
+    assert asyncio.run(main()) == [True, True, True, False]
+    # alice was least recently seen and is evicted for carol
+    assert backend.get_stats()["evicted_lru"] == 1
+    assert "alice" not in backend._tats
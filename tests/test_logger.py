@@ -0,0 +1,47 @@
+"""Async logging shutdown and restart."""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+SCRIPT = """
+import os
+from utils.logger import setup_logger, shutdown_logging
+
+logger = setup_logger("lifecycle")
+logger.info("before shutdown")
+shutdown_logging()
+logger.info("after shutdown")
+assert setup_logger("lifecycle") is logger
+if os.environ["LOG_ASYNC"] == "true":
+    assert [type(handler).__name__ for handler in logger.handlers] == ["_DeferredQueueHandler"]
+logger.info("after restart")
+shutdown_logging()
+shutdown_logging()
+logger.info("after second shutdown")
+"""
+
+
+def run_script(log_async: str) -> str:
+    # A fresh interpreter, since logger setup is process-wide
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=Path(__file__).resolve().parent.parent,
+        env={**os.environ, "LOG_ASYNC": log_async, "LOG_REQUEST_SAMPLE_RATE": "1.0"},
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_records_logged_after_shutdown_and_restart_are_written():
+    messages = [line.rsplit(" - ", 1)[-1] for line in run_script("true").splitlines()]
+    assert messages == ["before shutdown", "after shutdown", "after restart", "after second shutdown"]
+
+
+def test_shutdown_is_a_no_op_for_synchronous_logging():
+    messages = [line.rsplit(" - ", 1)[-1] for line in run_script("false").splitlines()]
+    assert messages == ["before shutdown", "after shutdown", "after restart", "after second shutdown"]
@@ -0,0 +1,83 @@
+"""Splitting multi-sector Gemini output into per-sector reports."""
+
+import asyncio
+from types import SimpleNamespace
+
+from services.admission import FairAdmissionController
+from services.ai_service import AIService
+
+split = AIService._split_sector_reports
+
+
+def test_well_formed_output_is_split_by_sector():
+    text = (
+        "Here are your reports.\n"
+        "=== BEGIN SECTOR: banking ===\n# Banking\nBody\n=== END SECTOR: banking ===\n"
+        "=== BEGIN SECTOR: Real Estate ===\n# Real Estate\n=== END SECTOR: Real Estate ===\n"
+        "Trailing chatter"
+    )
+    assert split(text) == {"banking": "# Banking\nBody", "real estate": "# Real Estate"}
+
+
+def test_missing_end_runs_to_the_next_begin_or_the_end_of_output():
+    text = (
+        "=== BEGIN SECTOR: banking ===\n# Banking\n"
+        "=== BEGIN SECTOR: energy ===\n# Energy\n"
+    )
+    assert split(text) == {"banking": "# Banking", "energy": "# Energy"}
+
+
+def test_stray_and_mismatched_end_markers_are_tolerated():
+    text = (
+        "=== END SECTOR: retail ===\n"
+        "=== BEGIN SECTOR: banking ===\n# Banking\n=== END SECTOR: bank ===\n"
+        "Between reports\n"
+        "=== END SECTOR: banking ===\n"
+    )
+    assert split(text) == {"banking": "# Banking"}
+
+
+def test_first_report_wins_for_a_repeated_sector():
+    text = (
+        "=== BEGIN SECTOR: banking ===\n# First\n=== END SECTOR: banking ===\n"
+        "=== BEGIN SECTOR: banking ===\n# Second\n=== END SECTOR: banking ===\n"
+    )
+    assert split(text) == {"banking": "# First"}
+
+
+def test_markers_must_be_on_their_own_line_but_may_be_indented():
+    text = "  === BEGIN SECTOR: banking ===  \n# Banking, not === END SECTOR: banking === inline\n"
+    assert split(text) == {"banking": "# Banking, not === END SECTOR: banking === inline"}
+
+
+def test_output_without_markers_yields_nothing():
+    assert split("# A single report with no markers") == {}
+    assert split("") == {}
+
+
+class _ScriptedModel:
+    """Returns a fixed multi-sector reply first, then single-sector replies."""
+
+    model_name = "models/scripted"
+
+    def __init__(self, first_reply: str):
+        self.prompts = []
+        self._first_reply = first_reply
+
+    async def generate_content_async(self, prompt):
+        self.prompts.append(prompt)
+        if len(self.prompts) == 1:
+            return SimpleNamespace(text=self._first_reply)
+        return SimpleNamespace(text="# Single Report\n\n## Disclaimer\nTest")
+
+
+def test_sectors_missing_from_the_output_are_generated_individually():
+    model = _ScriptedModel("=== BEGIN SECTOR: banking ===\n# Banking\n## Disclaimer\nTest\n=== END SECTOR: banking ===")
+    service = AIService(api_key="test", model=model, admission=FairAdmissionController(max_concurrent=2))
+    market_data = {"banking": [], "energy": []}
+
+    reports = asyncio.run(service._generate_sector_group(market_data, "alice"))
+
+    assert reports["banking"].startswith("# Banking")
+    assert reports["energy"].startswith("# Single Report")
+    assert len(model.prompts) == 2
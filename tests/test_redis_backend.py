@@ -0,0 +1,108 @@
+"""RedisBackend against the fake Redis-protocol server."""
+
+import time
+import asyncio
+
+import pytest
+
+from benchmarks.fake_redis import FakeRedisServer
+from security.rate_limit_backends import BackendUnavailableError, RedisBackend
+
+
+def run_with_server(test, reply_delay: float = 0.0, **backend_kwargs):
+    """Run test(backend, fake) with a RedisBackend connected to a fresh fake server."""
+
+    async def main():
+        fake = FakeRedisServer(reply_delay=reply_delay)
+        server = await fake.start()
+        port = server.sockets[0].getsockname()[1]
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/1", **backend_kwargs)
+        try:
+            await test(backend, fake)
+        finally:
+            await backend.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_sliding_window_limits_and_costs():
+    async def test(backend, fake):
+        assert (await backend.hit("alice", 3, 60))[:2] == (True, 2)
+        assert (await backend.hit("alice", 3, 60, cost=2))[:2] == (True, 0)
+        allowed, remaining, reset_after = await backend.hit("alice", 3, 60)
+        assert not allowed and remaining == 0
+        assert 0 < reset_after <= 60
+        assert (await backend.peek("alice", 3, 60))[0] == 0
+        assert (await backend.hit("bob", 3, 60))[:2] == (True, 2)
+
+    run_with_server(test)
+
+
+def test_batch_larger_than_remaining_is_rejected_whole():
+    async def test(backend, fake):
+        await backend.hit("alice", 3, 60, cost=2)
+        assert not (await backend.hit("alice", 3, 60, cost=2))[0]
+        assert (await backend.peek("alice", 3, 60))[0] == 1
+
+    run_with_server(test)
+
+
+def test_gcra_burst():
+    async def test(backend, fake):
+        results = [(await backend.hit_gcra("alice", 6.0, 3))[0] for _ in range(4)]
+        assert results == [True, True, True, False]
+        assert (await backend.peek_gcra("alice", 6.0, 3))[0] == 0
+
+    run_with_server(test)
+
+
+def test_cancelled_command_does_not_leak_reply_to_next_caller():
+    async def test(backend, fake):
+        # alice is at her limit, bob has not made any requests
+        await backend.hit("alice", 1, 60)
+        fake.reply_delay = 0.2
+        pending = asyncio.create_task(backend.hit("alice", 1, 60))
+        await asyncio.sleep(0.05)
+        pending.cancel()
+        fake.reply_delay = 0.0
+
+        # Without dropping the connection, bob would read alice's denial
+        assert (await backend.hit("bob", 1, 60))[0] is True
+        assert await backend._client.execute("ECHO", "user-B") == "user-B"
+
+    # One connection, so bob's check reuses the one alice's was cancelled on
+    run_with_server(test, pool_size=1)
+
+
+def test_unresponsive_server_times_out_and_connection_recovers():
+    async def test(backend, fake):
+        fake.reply_delay = 5.0
+        started_at = time.monotonic()
+        # bob's check waits for the only connection, which alice's holds
+        results = await asyncio.gather(
+            backend.hit("alice", 3, 60), backend.hit("bob", 3, 60), return_exceptions=True
+        )
+        assert all(isinstance(result, BackendUnavailableError) for result in results)
+        assert time.monotonic() - started_at < 1.0
+
+        fake.reply_delay = 0.0
+        assert (await backend.hit("alice", 3, 60))[0] is True
+        assert await backend._client.execute("ECHO", "user-B") == "user-B"
+
+    run_with_server(test, pool_size=1, timeout=0.2)
+
+
+def test_unreachable_server_is_reported_as_unavailable():
+    async def main():
+        server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/0", timeout=0.2)
+        with pytest.raises(BackendUnavailableError):
+            await backend.hit("alice", 3, 60)
+        await backend.close()
+
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+The rate limiter's Lua scripts against a real Redis server.
+
+FakeRedisServer answers EVALSHA with Python copies of the scripts, so these
+tests run the Lua on a real server and check the fake returns the same
+replies. They are skipped unless REDIS_TEST_URL points at a disposable
+Redis (for example redis://localhost:6379/15).
+"""
+
+import os
+import uuid
+import asyncio
+from typing import Any, List, Tuple
+
+import pytest
+
+from benchmarks.fake_redis import FakeRedisServer
+from security.rate_limit_backends import _GCRA_SCRIPT, _SLIDING_WINDOW_SCRIPT, RedisBackend
+
+REDIS_TEST_URL = os.getenv("REDIS_TEST_URL")
+
+pytestmark = pytest.mark.skipif(not REDIS_TEST_URL, reason="REDIS_TEST_URL is not set")
+
+# (now, window, limit, record, cost): fills a window of 3, denies, then expires
+SLIDING_WINDOW_CALLS = [
+    (1000.0, 60.0, 3, "1", 1),
+    (1001.0, 60.0, 3, "1", 2),
+    (1002.0, 60.0, 3, "1", 1),
+    (1002.0, 60.0, 3, "0", 1),
+    (1003.0, 60.0, 3, "1", 2),
+    (1003.0, 60.0, 3, "1", 5),
+    (1060.5, 60.0, 3, "1", 1),
+    (1060.5, 60.0, 3, "0", 1),
+    (1200.0, 60.0, 3, "0", 1),
+]
+
+# (now, emission_interval, burst, record, cost): burst of 3, refill, oversized cost
+GCRA_CALLS = [
+    (1000.0, 6.0, 3, "1", 1),
+    (1000.0, 6.0, 3, "1", 1),
+    (1000.0, 6.0, 3, "1", 1),
+    (1000.0, 6.0, 3, "1", 1),
+    (1000.0, 6.0, 3, "0", 1),
+    (1006.5, 6.0, 3, "1", 1),
+    (1006.5, 6.0, 3, "1", 4),
+    (1100.0, 6.0, 3, "0", 1),
+    (1100.0, 6.0, 3, "1", 3),
+]
+
+
+def run_against_both(test):
+    """Run test(real, fake) with RedisBackends on the real server and on a fresh fake."""
+
+    async def main():
+        real = RedisBackend(REDIS_TEST_URL, key_prefix=f"test:{uuid.uuid4().hex}:")
+        try:
+            await real._client.execute("PING")
+        except Exception as e:
+            await real.close()
+            pytest.skip(f"Redis at {REDIS_TEST_URL} is not reachable: {e!r}")
+
+        server = await FakeRedisServer().start()
+        port = server.sockets[0].getsockname()[1]
+        fake = RedisBackend(f"redis://127.0.0.1:{port}/0", key_prefix=real.key_prefix)
+        try:
+            await test(real, fake)
+        finally:
+            await real.close()
+            await fake.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def normalize(reply: List[Any]) -> Tuple[int, int, float]:
+    allowed, remaining, reset_after = reply
+    return int(allowed), int(remaining), round(float(reset_after), 9)
+
+
+def test_sliding_window_script_matches_fake():
+    async def test(real, fake):
+        key = f"{real.key_prefix}alice"
+        for index, (now, window, limit, record, cost) in enumerate(SLIDING_WINDOW_CALLS):
+            argv = (repr(now), repr(window), limit, f"member-{index}", record, cost)
+            expected = normalize(await real._eval(_SLIDING_WINDOW_SCRIPT, key, *argv))
+            actual = normalize(await fake._eval(_SLIDING_WINDOW_SCRIPT, key, *argv))
+            assert actual == expected, f"call {index} {argv}"
+
+    run_against_both(test)
+
+
+def test_gcra_script_matches_fake():
+    async def test(real, fake):
+        key = f"{real.key_prefix}gcra:alice"
+        for index, (now, interval, burst, record, cost) in enumerate(GCRA_CALLS):
+            argv = (repr(now), repr(interval), burst, record, cost)
+            expected = normalize(await real._eval(_GCRA_SCRIPT, key, *argv))
+            actual = normalize(await fake._eval(_GCRA_SCRIPT, key, *argv))
+            assert actual == expected, f"call {index} {argv}"
+
+    run_against_both(test)
+
+
+def test_backend_on_real_redis():
+    async def test(real, fake):
+        assert (await real.hit("alice", 3, 60))[:2] == (True, 2)
+        assert (await real.hit("alice", 3, 60, cost=2))[:2] == (True, 0)
+        allowed, remaining, reset_after = await real.hit("alice", 3, 60)
+        assert not allowed and remaining == 0
+        assert 0 < reset_after <= 60
+        assert (await real.peek("alice", 3, 60))[0] == 0
+
+        results = [(await real.hit_gcra("bob", 6.0, 3))[0] for _ in range(4)]
+        assert results == [True, True, True, False]
+        assert (await real.peek_gcra("bob", 6.0, 3))[0] == 0
+
+    run_against_both(test)
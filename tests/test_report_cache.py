@@ -0,0 +1,93 @@
+"""ReportCache TTL expiry, stale window and LRU eviction."""
+
+import time
+
+from services.report_cache import ReportCache
+
+BANKING = ReportCache.make_key("banking", "models/test", "1")
+ENERGY = ReportCache.make_key("energy", "models/test", "1")
+RETAIL = ReportCache.make_key("retail", "models/test", "1")
+
+
+def test_get_returns_fresh_reports_and_expires_them_at_the_ttl():
+    cache = ReportCache(ttl_seconds=10, max_stale_seconds=0)
+    cache.set(BANKING, "# Banking")
+    assert cache.get(BANKING) == "# Banking"
+
+    # age backdates the entry, as for reports loaded from storage
+    cache.set(ENERGY, "# Energy", age=9.95)
+    assert cache.get(ENERGY) == "# Energy"
+    time.sleep(0.1)
+    assert cache.get(ENERGY) is None
+    assert cache.get_stats()["entries"] == 1
+
+
+def test_reports_past_the_ttl_are_not_cached():
+    cache = ReportCache(ttl_seconds=10, max_stale_seconds=0)
+    cache.set(BANKING, "# Banking", age=10)
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_report_is_evicted_past_max_bytes():
+    cache = ReportCache(ttl_seconds=60, max_bytes=20)
+    cache.set(BANKING, "b" * 8)
+    cache.set(ENERGY, "e" * 8)
+    # A lookup makes banking the most recently used
+    assert cache.get(BANKING) is not None
+    cache.set(RETAIL, "r" * 8)
+
+    assert cache.get(ENERGY) is None
+    assert cache.get(BANKING) == "b" * 8
+    assert cache.get(RETAIL) == "r" * 8
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["size_bytes"], stats["evictions"]) == (2, 16, 1)
+
+
+def test_replacing_a_report_updates_the_size_and_oversized_reports_are_skipped():
+    cache = ReportCache(ttl_seconds=60, max_bytes=20)
+    cache.set(BANKING, "b" * 8)
+    cache.set(BANKING, "b" * 4)
+    cache.set(ENERGY, "e" * 21)
+    assert cache.get_stats()["size_bytes"] == 4
+    assert cache.get(ENERGY) is None
+
+
+def test_size_is_counted_in_utf8_bytes():
+    cache = ReportCache(ttl_seconds=60, max_bytes=20)
+    cache.set(BANKING, "€" * 4)
+    assert cache.get_stats()["size_bytes"] == 12
+
+
+def test_lookup_classifies_fresh_stale_and_expired_reports():
+    cache = ReportCache(ttl_seconds=10, max_stale_seconds=5)
+    cache.set(BANKING, "# Fresh", age=9.9)
+    cache.set(ENERGY, "# Stale", age=10)
+    cache.set(RETAIL, "# Expired", age=15)
+
+    fresh = cache.lookup(BANKING)
+    assert (fresh.report, fresh.stale) == ("# Fresh", False)
+    assert 9.9 <= fresh.age < 10
+    stale = cache.lookup(ENERGY)
+    assert (stale.report, stale.stale) == ("# Stale", True)
+    assert cache.lookup(RETAIL) is None
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_stale_reports_are_misses_for_get_and_dropped_past_the_hard_ttl():
+    cache = ReportCache(ttl_seconds=10, max_stale_seconds=5)
+    cache.set(BANKING, "# Banking", age=14.95)
+    assert cache.get(BANKING) is None
+    assert cache.lookup(BANKING, allow_stale=False) is None
+    assert cache.lookup(BANKING).stale
+
+    time.sleep(0.1)
+    assert cache.lookup(BANKING) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_no_stale_window_by_default():
+    cache = ReportCache(ttl_seconds=10)
+    cache.set(BANKING, "# Banking", age=10)
+    assert cache.lookup(BANKING) is None
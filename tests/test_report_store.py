@@ -0,0 +1,107 @@
+"""ReportStore batching, queries and shutdown."""
+
+import os
+import sys
+import time
+import zlib
+import asyncio
+import subprocess
+from pathlib import Path
+
+from services.report_store import ReportStore
+
+
+def test_close_writes_reports_in_the_pending_batch(tmp_path):
+    path = str(tmp_path / "reports.sqlite3")
+
+    async def main():
+        store = ReportStore(path, batch_size=32, flush_interval=5.0)
+        store.start()
+        for i in range(3):
+            store.save("banking", f"# Report {i}", "models/test", "1", f"fp{i}")
+        # The writer has pulled the reports and is waiting to fill its batch
+        await asyncio.sleep(0.1)
+        await store.close()
+
+        reopened = ReportStore(path)
+        history = await reopened.history("banking", limit=10, include_body=True)
+        await reopened.close()
+        return history
+
+    history = asyncio.run(main())
+    assert sorted(item.report for item in history) == ["# Report 0", "# Report 1", "# Report 2"]
+
+
+def test_latest_and_history(tmp_path):
+    async def main():
+        store = ReportStore(str(tmp_path / "reports.sqlite3"), batch_size=2, flush_interval=0.05)
+        store.start()
+        for i in range(3):
+            store.save("banking", f"# Banking {i}", "models/test", "1", f"fp{i}")
+            store.save("energy", f"# Energy {i}", "models/test", "1")
+            await asyncio.sleep(0.01)
+        store.save("banking", "# Other model", "models/other", "1")
+        await store.close()
+
+        store = ReportStore(str(tmp_path / "reports.sqlite3"))
+        latest = await store.latest("banking", "models/test", "1")
+        per_sector = await store.latest_per_sector("models/test", "1")
+        history = await store.history("banking", limit=2)
+        await store.close()
+        return latest, per_sector, history
+
+    latest, per_sector, history = asyncio.run(main())
+    assert (latest.report, latest.search_fingerprint) == ("# Banking 2", "fp2")
+    assert {item.sector: item.report for item in per_sector} == {"banking": "# Banking 2", "energy": "# Energy 2"}
+    assert [item.model_name for item in history] == ["models/other", "models/test"]
+    assert all(item.report is None for item in history)
+
+
+def test_saves_are_dropped_when_the_writer_is_not_running_or_the_queue_is_full(tmp_path):
+    async def main():
+        store = ReportStore(str(tmp_path / "reports.sqlite3"), max_queued=2, flush_interval=5.0)
+        store.save("banking", "# Before start", "models/test", "1")
+        store.start()
+        # The writer has not run yet, so the third report finds the queue full
+        for i in range(3):
+            store.save("banking", f"# Report {i}", "models/test", "1")
+        await store.close()
+        store.save("banking", "# After close", "models/test", "1")
+        return store.get_stats()
+
+    stats = asyncio.run(main())
+    assert (stats["written"], stats["dropped"]) == (2, 3)
+
+
+def test_retention_limits_rows_per_sector_and_age(tmp_path):
+    def row(sector, generated_at, report):
+        return (sector, generated_at, "models/test", "1", None, zlib.compress(report.encode("utf-8")))
+
+    async def main():
+        store = ReportStore(str(tmp_path / "reports.sqlite3"), max_per_sector=2, max_age_seconds=3600)
+        now = time.time()
+        await store._write([row("energy", now - 7200, "# Expired")])
+        await store._write([row("banking", now - i, f"# Banking {i}") for i in range(4)])
+        banking = await store.history("banking", limit=10, include_body=True)
+        energy = await store.history("energy", limit=10)
+        stats = store.get_stats()
+        await store.close()
+        return banking, energy, stats
+
+    banking, energy, stats = asyncio.run(main())
+    assert [item.report for item in banking] == ["# Banking 0", "# Banking 1"]
+    # The expired report is deleted with the next batch
+    assert energy == []
+    assert stats["pruned"] == 3
+
+
+def test_import_does_not_open_the_database(tmp_path):
+    result = subprocess.run(
+        [sys.executable, "-c", "import services.report_store"],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parent.parent)},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert list(tmp_path.iterdir()) == []
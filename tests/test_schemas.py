@@ -0,0 +1,25 @@
+"""Response schemas."""
+
+import sys
+import subprocess
+from pathlib import Path
+
+from models.schemas import ReportHistoryItem
+
+
+def test_schemas_import_without_warnings():
+    # A fresh interpreter, since this process has already imported the module
+    result = subprocess.run(
+        [sys.executable, "-W", "error", "-c", "import models.schemas"],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_report_history_item_keeps_model_name():
+    item = ReportHistoryItem(
+        id=1, generated_at="2024-01-01T00:00:00", model_name="gemini-pro", prompt_version="v1"
+    )
+    assert item.model_dump()["model_name"] == "gemini-pro"
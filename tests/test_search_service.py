@@ -0,0 +1,20 @@
+"""SearchService connection pool settings."""
+
+from services.search_service import SearchService
+
+
+def test_explicit_zero_pool_settings_are_honored(monkeypatch):
+    monkeypatch.setenv("SEARCH_KEEPALIVE_EXPIRY", "45")
+    monkeypatch.setenv("SEARCH_MAX_KEEPALIVE_CONNECTIONS", "7")
+    service = SearchService(max_keepalive_connections=0, keepalive_expiry=0)
+    assert service.limits.keepalive_expiry == 0
+    assert service.limits.max_keepalive_connections == 0
+
+
+def test_unset_pool_settings_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SEARCH_MAX_CONNECTIONS", "5")
+    monkeypatch.setenv("SEARCH_MAX_KEEPALIVE_CONNECTIONS", "3")
+    monkeypatch.setenv("SEARCH_KEEPALIVE_EXPIRY", "45")
+    service = SearchService()
+    assert (service.limits.max_connections, service.limits.max_keepalive_connections) == (5, 3)
+    assert service.limits.keepalive_expiry == 45.0
@@ -0,0 +1,95 @@
+"""SingleFlight coalescing and cancellation."""
+
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "report"
+
+    async def main():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("banking", work) for _ in range(5)))
+        return flights, results
+
+    flights, results = asyncio.run(main())
+    assert results == ["report"] * 5
+    assert (calls, flights.coalesced, flights.in_flight()) == (1, 4, 0)
+
+
+def test_cancelling_the_leader_does_not_cancel_followers():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return "report"
+
+    async def main():
+        flights = SingleFlight()
+        leader = asyncio.create_task(flights.do("banking", work))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flights.do("banking", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, flights
+
+    result, flights = asyncio.run(main())
+    assert (result, calls, flights.in_flight()) == ("report", 1, 0)
+
+
+def test_cancelled_leader_alone_lets_the_work_finish_and_the_next_call_start_fresh():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    async def main():
+        flights = SingleFlight()
+        leader = asyncio.create_task(flights.do("banking", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.sleep(0.1)
+        # The shielded work ran to completion and was forgotten
+        assert flights.in_flight() == 0
+        return await flights.do("banking", work)
+
+    assert asyncio.run(main()) == 2
+
+
+def test_failures_reach_every_caller_and_are_not_cached():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        if calls == 1:
+            raise RuntimeError("search failed")
+        return "report"
+
+    async def main():
+        flights = SingleFlight()
+        results = await asyncio.gather(
+            flights.do("banking", work), flights.do("banking", work), return_exceptions=True
+        )
+        return results, await flights.do("banking", work)
+
+    results, retry = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == "report"
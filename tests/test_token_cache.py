@@ -0,0 +1,57 @@
+"""Verified-token cache expiry and eviction."""
+
+import time
+from datetime import timedelta
+
+from security.auth import _TokenCache, create_access_token, token_cache, verify_token
+
+
+def test_entries_expire_at_the_exp_claim():
+    cache = _TokenCache()
+    key = cache.digest("token")
+    cache.set(key, {"sub": "alice", "exp": time.time() + 0.1})
+    assert cache.get(key)["sub"] == "alice"
+
+    time.sleep(0.15)
+    assert cache.get(key) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_entry_is_a_miss_at_exactly_exp():
+    cache = _TokenCache()
+    key = cache.digest("token")
+    cache.set(key, {"sub": "alice", "exp": time.time()})
+    assert cache.get(key) is None
+
+
+def test_payloads_without_a_numeric_exp_are_not_cached():
+    cache = _TokenCache()
+    cache.set(cache.digest("a"), {"sub": "alice"})
+    cache.set(cache.digest("b"), {"sub": "bob", "exp": "tomorrow"})
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_token_is_evicted():
+    cache = _TokenCache(max_entries=2)
+    exp = time.time() + 60
+    keys = [cache.digest(name) for name in ("a", "b", "c")]
+    cache.set(keys[0], {"sub": "a", "exp": exp})
+    cache.set(keys[1], {"sub": "b", "exp": exp})
+    assert cache.get(keys[0]) is not None
+    cache.set(keys[2], {"sub": "c", "exp": exp})
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_verify_token_caches_valid_tokens_and_never_expired_ones():
+    token_cache.clear()
+    token = create_access_token({"sub": "alice", "user_id": "alice"})
+    hits = token_cache.hits
+    assert verify_token(token)["user_id"] == "alice"
+    assert verify_token(token)["user_id"] == "alice"
+    assert token_cache.hits == hits + 1
+
+    expired = create_access_token({"sub": "bob"}, expires_delta=timedelta(seconds=-1))
+    assert verify_token(expired) is None
+    assert token_cache.get(token_cache.digest(expired)) is None
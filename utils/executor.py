@@ -0,0 +1,67 @@
+"""Thread pool executor with queue-depth and active-worker metrics."""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class MeteredThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that tracks how many tasks are queued and running.
+
+    Used as a dedicated pool for blocking SDK calls so they neither share
+    nor starve the event loop's default executor.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = ""):
+        """
+        Initialize executor.
+
+        Args:
+            max_workers: Number of worker threads
+            thread_name_prefix: Prefix for worker thread names
+        """
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.max_workers = max_workers
+        self._metrics_lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        """Submit a callable, counting it as queued until a worker picks it up."""
+        with self._metrics_lock:
+            self._queued += 1
+
+        def run() -> Any:
+            with self._metrics_lock:
+                self._queued -= 1
+                self._active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._metrics_lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        try:
+            return super().submit(run)
+        except Exception:
+            with self._metrics_lock:
+                self._queued -= 1
+            raise
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get executor statistics.
+
+        Returns:
+            Dictionary with queue depth, active workers and totals
+        """
+        with self._metrics_lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "active_workers": self._active,
+                "completed": self._completed,
+            }
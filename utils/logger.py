@@ -1,39 +1,161 @@
 """Logging configuration."""
 
-import logging
+import os
 import sys
-from pathlib import Path
+import atexit
+import queue
+import random
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Pass as ``extra=SAMPLED`` on per-request INFO logs that may be sampled
+SAMPLED = {"sampled": True}
+
+# Background listener writing queued records (async mode only)
+_listener: Optional[QueueListener] = None
+# Logger and handler feeding the listener; the handler is swapped for a
+# direct one while the listener is stopped
+_queue_logger: Optional[logging.Logger] = None
+_queue_handler: Optional[logging.Handler] = None
+_direct_handler: Optional[logging.Handler] = None
+
+
+class _SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO-and-below records marked as sampled."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not getattr(record, "sampled", False):
+            return True
+        return random.random() < self.rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats each record before enqueueing it, which keeps
+    message interpolation on the request path. Records here stay in-process,
+    so they are passed through untouched.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that leaves flushing to the batching listener."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchingQueueListener(QueueListener):
+    """QueueListener that flushes its handlers once the queue is drained."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+    def stop(self) -> None:
+        super().stop()
+        # The stop sentinel may have arrived before the last batch was flushed
+        for handler in self.handlers:
+            handler.flush()
+
 
 def setup_logger(name: str = "trade_opportunities_api", level: int = logging.INFO) -> logging.Logger:
     """
     Set up and configure logger for the application.
-    
+
+    With ``LOG_ASYNC=true`` records are put on an in-memory queue and
+    formatted and written by a background thread in batches, so request
+    handlers never block on stdout. ``LOG_REQUEST_SAMPLE_RATE`` (0.0-1.0)
+    keeps only that fraction of per-request INFO logs marked with SAMPLED.
+
     Args:
         name: Logger name
         level: Logging level (default: INFO)
-        
+
     Returns:
         Configured logger instance
     """
+    global _queue_logger, _direct_handler
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
-    # Avoid duplicate handlers
+
+    # Avoid duplicate handlers; restart the listener if shutdown_logging() stopped it
     if logger.handlers:
+        if logger is _queue_logger and _listener is None:
+            _start_listener(logger)
         return logger
-    
-    # Create console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
-    
+
     # Create formatter
     formatter = logging.Formatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(console_handler)
-    
+
+    if os.getenv("LOG_ASYNC", "false").lower() == "true":
+        # Used while the listener is stopped, so records are never stranded in the queue
+        _direct_handler = logging.StreamHandler(sys.stdout)
+        _direct_handler.setLevel(level)
+        _direct_handler.setFormatter(formatter)
+        _queue_logger = logger
+        _start_listener(logger)
+        atexit.register(shutdown_logging)
+    else:
+        # Create console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(level)
+        console_handler.setFormatter(formatter)
+        logger.addHandler(console_handler)
+
+    sample_rate = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "1.0"))
+    if sample_rate < 1.0:
+        logger.addFilter(_SamplingFilter(sample_rate))
+
     return logger
 
+
+def _start_listener(logger: logging.Logger) -> None:
+    """Route a logger's records through a new queue and background listener."""
+    global _listener, _queue_handler
+    # Console output happens on the listener thread
+    console_handler = _BufferedStreamHandler(sys.stdout)
+    console_handler.setLevel(_direct_handler.level)
+    console_handler.setFormatter(_direct_handler.formatter)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    logger.removeHandler(_direct_handler)
+    logger.addHandler(_queue_handler)
+    _listener = _BatchingQueueListener(log_queue, console_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Stop the background log listener, writing out any queued records.
+
+    Later records are written directly until setup_logger() restarts the
+    listener.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    # Detach first so no record is queued after the listener has drained
+    _queue_logger.removeHandler(_queue_handler)
+    _queue_logger.addHandler(_direct_handler)
+    _queue_handler = None
+    _listener.stop()
+    _listener = None
@@ -0,0 +1,63 @@
+"""Single-flight coalescing of concurrent identical async calls."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one in-flight task.
+
+    The first caller for a key (the leader) starts the work as a task;
+    callers arriving while it runs (followers) await the same task. Each
+    caller awaits through asyncio.shield, so cancelling one caller never
+    cancels the shared work.
+    """
+
+    def __init__(self):
+        """Initialize single-flight group."""
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func once per key among concurrent callers.
+
+        Args:
+            key: Key identifying identical work
+            func: Zero-argument coroutine function performing the work
+
+        Returns:
+            Result of the shared call
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self.coalesced += 1
+            logger.debug("Coalescing request for key: %s", key)
+
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """
+        Get number of keys with work currently in flight.
+
+        Returns:
+            Number of in-flight tasks
+        """
+        return len(self._tasks)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Drop a finished task so the next call starts fresh work."""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Retrieve the exception so an unobserved failure is not logged by asyncio
+        if not task.cancelled():
+            task.exception()
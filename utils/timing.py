@@ -0,0 +1,117 @@
+"""Request-scoped stage timing, reported in Server-Timing headers and metrics."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from utils.metrics import stage_latency
+
+# Timing for the request being handled, set by ServerTimingMiddleware
+_current_timing: ContextVar[Optional["ServerTiming"]] = ContextVar("server_timing", default=None)
+
+
+class ServerTiming:
+    """Stage durations and notes collected while handling one request."""
+
+    def __init__(self):
+        """Initialize empty timing."""
+        self.durations: Dict[str, float] = {}
+        self.descriptions: Dict[str, str] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time spent in a stage (repeated stages accumulate)."""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def describe(self, name: str, description: str) -> None:
+        """Attach a duration-less note, such as whether a cache was hit."""
+        self.descriptions[name] = description
+
+    def header_value(self) -> str:
+        """
+        Format the collected timings as a Server-Timing header value.
+
+        Returns:
+            Header value, e.g. ``auth;dur=0.4, llm;dur=2103.7, cache;desc="miss"``
+        """
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        parts.extend(f'{name};desc="{description}"' for name, description in self.descriptions.items())
+        return ", ".join(parts)
+
+
+def current_timing() -> Optional[ServerTiming]:
+    """Get the timing of the request being handled, if any."""
+    return _current_timing.get()
+
+
+def record_stage(stage: str, seconds: float, timing_name: Optional[str] = None) -> None:
+    """
+    Record the duration of a pipeline stage.
+
+    Args:
+        stage: Stage label for the latency histogram
+        seconds: Duration in seconds
+        timing_name: Server-Timing metric name (None to keep it out of the header)
+    """
+    stage_latency.observe(seconds, stage=stage)
+    timing = _current_timing.get()
+    if timing is not None and timing_name is not None:
+        timing.add(timing_name, seconds)
+
+
+@contextmanager
+def timed_stage(stage: str, timing_name: Optional[str] = None) -> Iterator[None]:
+    """Record the wall-clock duration of the block as a pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, timing_name)
+
+
+def describe(name: str, description: str) -> None:
+    """Attach a note to the current request's Server-Timing header."""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.describe(name, description)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that adds a Server-Timing header to HTTP responses.
+
+    Each request gets a fresh ServerTiming in a context variable; code along
+    the request path records stages into it with timed_stage(). Work that
+    runs in tasks spawned by the request (for example a coalesced report
+    generation) shares the same ServerTiming. Responses for which nothing
+    was recorded get no header.
+    """
+
+    def __init__(self, app):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = ServerTiming()
+        token = _current_timing.set(timing)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and (timing.durations or timing.descriptions):
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header_value().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timing.reset(token)